@@ -0,0 +1,149 @@
+"""
+Admission control for the chat endpoints.
+Bounds concurrent agent runs with a short wait queue, serializes requests within
+a session and applies per-client token-bucket rate limits.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class Rejected(Exception):
+    """A request was refused; maps to an HTTP status with a Retry-After hint."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets refilled at `rate_per_minute`, holding at most `burst` tokens."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_clients: int = 10000):
+        self._rate = rate_per_minute / 60.0
+        self._burst = max(1, burst)
+        self._max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.limited = 0
+
+    def check(self, client: str) -> None:
+        """Take a token for the client or raise Rejected (429)."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - updated) * self._rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            self.limited += 1
+            raise Rejected(429, "Too many requests. Please slow down.", (1 - tokens) / self._rate if self._rate else 60)
+        self._buckets[client] = (tokens - 1, now)
+        self._buckets.move_to_end(client)
+        while len(self._buckets) > self._max_clients:
+            self._buckets.popitem(last=False)
+
+
+class Ticket:
+    """Holds a session lock and an in-flight slot until released (release is idempotent)."""
+
+    def __init__(self, controller: "AdmissionController", session_id: str, session_lock: asyncio.Lock):
+        self._controller = controller
+        self.session_id = session_id
+        self._session_lock = session_lock
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self, time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """Global in-flight limit with a bounded wait queue and per-session ordering."""
+
+    def __init__(self, max_in_flight: int = 32, max_queue: int = 64, queue_timeout: float = 30.0):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_users: Dict[str, int] = {}
+        self._avg_service_time = 5.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _retry_after(self) -> float:
+        """Rough time until a queued request would start, from the average run time."""
+        return self._avg_service_time * (self.waiting + 1) / self.max_in_flight
+
+    def _reject(self, detail: str) -> Rejected:
+        self.rejected += 1
+        return Rejected(503, detail, self._retry_after())
+
+    async def admit(self, session_id: str) -> Ticket:
+        """Wait for this session's previous request and a free slot, or raise Rejected (503)."""
+        # Created lazily so they bind to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        if self.in_flight >= self.max_in_flight and self.waiting >= self.max_queue:
+            raise self._reject("Server is busy. Please try again shortly.")
+
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        self._session_users[session_id] = self._session_users.get(session_id, 0) + 1
+        self.waiting += 1
+        deadline = time.monotonic() + self.queue_timeout
+        lock_held = False
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout=self.queue_timeout)
+            lock_held = True
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            if lock_held:
+                lock.release()
+            self._forget_session(session_id)
+            raise self._reject("Server is busy. Please try again shortly.")
+        except BaseException:
+            if lock_held:
+                lock.release()
+            self._forget_session(session_id)
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        return Ticket(self, session_id, lock)
+
+    def _release(self, ticket: Ticket, elapsed: float) -> None:
+        self.in_flight -= 1
+        self._avg_service_time = 0.9 * self._avg_service_time + 0.1 * elapsed
+        self._semaphore.release()
+        ticket._session_lock.release()
+        self._forget_session(ticket.session_id)
+
+    def _forget_session(self, session_id: str) -> None:
+        """Drop a session's lock once no request holds or waits for it."""
+        users = self._session_users.get(session_id, 1) - 1
+        if users <= 0:
+            self._session_users.pop(session_id, None)
+            self._session_locks.pop(session_id, None)
+        else:
+            self._session_users[session_id] = users
+
+    def stats(self) -> Dict[str, float]:
+        """Return admission counters."""
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_service_seconds": round(self._avg_service_time, 2),
+        }
@@ -0,0 +1,142 @@
+"""
+Answer cache for repeated course questions.
+Serves first-turn, attachment-free questions from memory by exact or semantic match.
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+Embedder = Callable[[str], Awaitable[List[float]]]
+
+
+def normalize_question(text: str) -> str:
+    """Normalize a question for exact matching (case, accents, punctuation, spacing)."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def build_namespace(vector_store_id: str, *prompt_parts: str) -> str:
+    """Scope cache keys to a vector store and a hash of the prompt configuration."""
+    prompt_hash = hashlib.sha256("\0".join(prompt_parts).encode("utf-8")).hexdigest()[:16]
+    return f"{vector_store_id}:{prompt_hash}"
+
+
+def _unit(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _best_match(query: List[float], candidates: List[Tuple[str, List[float]]]) -> Tuple[Optional[str], float]:
+    best_key, best_score = None, -1.0
+    for key, vector in candidates:
+        score = sum(a * b for a, b in zip(query, vector))
+        if score > best_score:
+            best_key, best_score = key, score
+    return best_key, best_score
+
+
+@dataclass
+class CachedAnswer:
+    """A cached agent answer."""
+
+    answer: str
+    expires_at: float
+    embedding: Optional[List[float]] = None
+
+
+class AnswerCache:
+    """TTL/LRU cache of agent answers, scoped to a vector store and system prompt."""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+        embedder: Optional[Embedder] = None,
+        similarity_threshold: float = 0.95,
+    ):
+        self.namespace = namespace
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._embedder = embedder
+        self._similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _key(self, question: str) -> str:
+        return f"{self.namespace}:{normalize_question(question)}"
+
+    async def lookup(self, question: str) -> Tuple[Optional[str], Optional[List[float]]]:
+        """Find a cached answer for a question.
+
+        Returns the answer (or None) and, when semantic matching is enabled,
+        the question embedding so that `store` does not have to compute it again.
+        """
+        self._expire()
+        key = self._key(question)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry.answer, entry.embedding
+
+        embedding = None
+        if self._embedder is not None:
+            try:
+                embedding = _unit(await self._embedder(question))
+            except Exception as e:
+                print(f"Warning: question embedding failed: {e}")
+            if embedding is not None:
+                candidates = [(k, e.embedding) for k, e in self._entries.items() if e.embedding is not None]
+                match, score = await asyncio.to_thread(_best_match, embedding, candidates)
+                if match is not None and score >= self._similarity_threshold and match in self._entries:
+                    self._entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    return self._entries[match].answer, embedding
+
+        self.misses += 1
+        return None, embedding
+
+    async def store(self, question: str, answer: str, embedding: Optional[List[float]] = None) -> None:
+        """Cache the answer to a question."""
+        if not answer:
+            return
+        key = self._key(question)
+        self._entries[key] = CachedAnswer(answer, time.monotonic() + self._ttl_seconds, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every cached answer."""
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters."""
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
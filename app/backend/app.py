@@ -1,22 +1,34 @@
 from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-import base64
-import mimetypes
+from contextlib import asynccontextmanager
+import asyncio
 import io
 import os
 import sys
+import time
+import uuid
 from supabase import create_client, Client
-import pypdf
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 
 # Local imports
 from config import get_settings
+from chat_logger import ChatLogWriter
+from session_store import create_session_store
+from history import HistoryPolicy, compact_history, get_encoding
+from attachments import AttachmentProcessor
+from file_cache import AttachmentCache
+from answer_cache import AnswerCache, build_namespace
+from metrics import (
+    registry, request_id_var, turn_timings_var, observe_stage, timed_stage, record_usage, log_event,
+    CHAT_TURNS, REQUEST_SECONDS, SESSIONS, IN_FLIGHT, QUEUED, LOG_BACKLOG
+)
 from utils import (
     generate_session_id, 
     extract_text_from_content,
-    validate_file_type
+    format_sse
 )
 
 # Configure UTF-8 encoding for logging (only if needed on Windows)
@@ -37,11 +49,46 @@ except Exception as e:
 os.environ["OPENAI_API_KEY"] = settings.openai_api_key
 
 # Import OpenAI agents after setting API key
-from agents import Agent, FileSearchTool, Runner
+from agents import Agent, Runner
+from openai import AsyncOpenAI
+from file_search import SearchResultCache, create_search_tool
+from model_router import ModelRouter
+from coalescing import Flight, SingleFlight
+from probes import HealthMonitor
+from admission import AdmissionController, Rejected, Ticket, TokenBucketLimiter
+
+# Shared async OpenAI client for calls made outside the agents runner
+openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
 
 # Initialize Supabase client
 supabase: Client = create_client(settings.supabase_url, settings.supabase_service_role_key)
 
+# Background writer for chat logs (keeps Supabase round trips off the request path)
+chat_log_writer = ChatLogWriter(
+    supabase,
+    max_queue_size=settings.log_queue_size,
+    batch_size=settings.log_batch_size,
+    flush_interval=settings.log_flush_interval,
+)
+
+# Worker pool for PDF extraction and image encoding
+attachment_processor = AttachmentProcessor(
+    executor_kind=settings.attachment_executor,
+    max_workers=settings.attachment_workers,
+    max_concurrency=settings.attachment_concurrency,
+    max_file_bytes=settings.attachment_max_bytes,
+    max_pdf_pages=settings.attachment_max_pdf_pages,
+    timeout=settings.attachment_timeout,
+    cache=AttachmentCache(
+        max_memory_bytes=settings.attachment_cache_max_bytes,
+        disk_dir=settings.attachment_cache_dir,
+        max_disk_bytes=settings.attachment_cache_disk_max_bytes
+    ) if settings.attachment_cache_enabled else None,
+    image_max_side=settings.image_max_side,
+    image_format=settings.image_format,
+    image_quality=settings.image_quality
+)
+
 # Load system prompt
 system_prompt = "You are a helpful assistant."
 try:
@@ -50,10 +97,29 @@ try:
 except FileNotFoundError:
     print("Warning: system_prompt.txt not found. Using default system prompt.")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers and drain them on shutdown."""
+    chat_log_writer.start()
+    health_monitor.start()
+    # Load the tokenizer in a worker thread so the first long session does not pay for it
+    asyncio.get_running_loop().run_in_executor(None, get_encoding)
+    watcher = asyncio.create_task(watch_vector_store_version()) if answer_cache or search_cache else None
+    yield
+    # Report not ready first so load balancers stop routing here while we drain
+    await health_monitor.stop()
+    if watcher:
+        watcher.cancel()
+    await chat_log_writer.stop()
+    print(f"Chat log writer stopped: {chat_log_writer.stats()}")
+    await session_store.close()
+    attachment_processor.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="ISST Tutoring AI Agent Backend",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -62,27 +128,64 @@ app.add_middleware(
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["POST", "GET"],
-    allow_headers=["Content-Type"],
+    allow_headers=["Content-Type", "X-Request-ID"],
+    expose_headers=["X-Request-ID"],
 )
 
-# In-memory storage for conversation histories
-session_histories: Dict[str, List[Dict[str, Any]]] = {}
+# Conversation history storage (in-memory LRU or shared SQLite, see Settings.session_backend)
+session_store = create_session_store(settings)
 
-async def log_to_supabase(session_id: str, role: str, content: str) -> None:
-    """Log conversation to Supabase with error handling."""
-    try:
-        data = {"session_id": session_id, "role": role, "content": content}
-        supabase.table("chat_logs").insert(data).execute()
-    except Exception as e:
-        print(f"Error logging to Supabase: {e}")
+# Bounds the prompt resent to the agent on every turn
+history_policy = HistoryPolicy(
+    keep_last_turns=settings.history_keep_turns,
+    max_input_tokens=settings.history_max_input_tokens
+)
+
+async def probe_model() -> str:
+    """Check that the agent model is reachable with our key."""
+    model = await probe_client.models.retrieve(settings.agent_model)
+    return f"Model {model.id} available"
+
+async def probe_vector_store() -> str:
+    """Check that the vector store exists and can serve searches."""
+    store = await probe_client.vector_stores.retrieve(settings.vector_store_id)
+    if store.status == "expired":
+        raise RuntimeError(f"Vector store {store.id} has expired")
+    return f"{store.name} ({store.status}, {store.file_counts.completed} files)"
+
+async def probe_chat_logs() -> str:
+    """Check that the chat_logs table is reachable."""
+    await asyncio.to_thread(lambda: supabase.table("chat_logs").select("id").limit(1).execute())
+    return "chat_logs reachable"
+
+# Background dependency probes; health endpoints only read their cached results
+probe_client = openai_client.with_options(max_retries=0)
+health_monitor = HealthMonitor(
+    {"openai_model": probe_model, "vector_store": probe_vector_store, "chat_logs": probe_chat_logs},
+    interval=settings.health_probe_interval,
+    timeout=settings.health_probe_timeout,
+    # Chat logs are written best-effort in the background, so a Supabase outage must not drain the fleet
+    required={"openai_model", "vector_store"}
+)
+
+def log_to_supabase(session_id: str, role: str, content: str) -> None:
+    """Queue a conversation log row for the background Supabase writer."""
+    if not chat_log_writer.log(session_id, role, content):
+        print(f"Warning: chat log queue full, dropped {role} message for session {session_id}")
+
+# Short-lived cache of search results for repeated tool queries
+search_cache = SearchResultCache(
+    ttl_seconds=settings.file_search_cache_ttl_seconds,
+    max_entries=settings.file_search_cache_max_entries
+) if settings.file_search_cache_enabled else None
 
 # Initialize Search Tool and Agent
 try:
-    search_tool = FileSearchTool(vector_store_ids=[settings.vector_store_id])
+    search_tool = create_search_tool(settings, openai_client, search_cache)
     isst_agent = Agent(
         name="ISST Teaching Assistant",
         instructions=system_prompt,
-        model="gpt-4o",
+        model=settings.agent_model,
         tools=[search_tool]
     )
     print("✅ Agent initialized successfully")
@@ -90,10 +193,171 @@ except Exception as e:
     print(f"❌ Failed to initialize agent: {e}")
     sys.exit(1)
 
+# Routes simple turns to a faster model; every model shares the same instructions and tools
+model_router = ModelRouter(
+    default_model=settings.agent_model,
+    fast_model=settings.routing_fast_model,
+    max_simple_chars=settings.routing_max_simple_chars
+) if settings.routing_enabled else None
+agents_by_model = {isst_agent.model: isst_agent}
+if model_router:
+    agents_by_model.setdefault(model_router.fast_model, isst_agent.clone(model=model_router.fast_model))
+
+def select_agent(session_id: str, pregunta: str, files: List[UploadFile], history: List[Dict[str, Any]]) -> Agent:
+    """Choose the agent for a turn and record the route taken."""
+    if model_router is None:
+        return isst_agent
+    route = model_router.route(pregunta, bool(files), history)
+    if settings.request_log_enabled:
+        log_event("route", session_id=session_id, model=route.model, route=route.name, reason=route.reason)
+    return agents_by_model[route.model]
+
+async def embed_question(text: str) -> List[float]:
+    """Embed a question for semantic answer cache lookups."""
+    response = await openai_client.embeddings.create(model=settings.answer_cache_embedding_model, input=text)
+    return response.data[0].embedding
+
+# Scopes shared answers to the vector store, prompt, models and retrieval settings
+answer_namespace = build_namespace(
+    settings.vector_store_id, system_prompt, *agents_by_model,
+    f"{settings.file_search_max_results}:{settings.file_search_score_threshold}"
+)
+
+# Cache of answers to first-turn, attachment-free questions
+answer_cache = AnswerCache(
+    namespace=answer_namespace,
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+    max_entries=settings.answer_cache_max_entries,
+    embedder=embed_question if settings.answer_cache_semantic else None,
+    similarity_threshold=settings.answer_cache_similarity
+) if settings.answer_cache_enabled else None
+
+async def watch_vector_store_version() -> None:
+    """Invalidate cached answers and search results whenever the vector store contents change."""
+    corpus_version = None
+    while True:
+        try:
+            store = await openai_client.vector_stores.retrieve(settings.vector_store_id)
+            version = f"{store.file_counts.total}:{store.file_counts.completed}:{store.usage_bytes}"
+            if corpus_version is not None and version != corpus_version:
+                if answer_cache:
+                    answer_cache.invalidate()
+                if search_cache:
+                    search_cache.invalidate()
+                print("Vector store contents changed, caches invalidated")
+            corpus_version = version
+        except Exception as e:
+            print(f"Warning: could not check vector store version: {e}")
+        await asyncio.sleep(settings.answer_cache_refresh_interval)
+
+def cacheable_question(pregunta: str, files: List[UploadFile], history: List[Dict[str, Any]]) -> Optional[str]:
+    """Return the question if the turn can be served from the answer cache."""
+    if answer_cache is None or files or history or not pregunta.strip():
+        return None
+    return pregunta
+
+# Shares one agent run between identical first-turn questions in flight at the same time
+single_flight = SingleFlight(answer_namespace)
+
+def coalescing_key(pregunta: str, files: List[UploadFile], history: List[Dict[str, Any]], agent: Agent) -> Optional[str]:
+    """Return the key under which this turn can share an agent run, if it is a first-turn question."""
+    if not settings.coalescing_enabled or files or history or not pregunta.strip():
+        return None
+    return single_flight.key(pregunta, agent.model)
+
+# Bounds concurrent agent runs and keeps each session's turns in order
+admission = AdmissionController(
+    max_in_flight=settings.admission_max_in_flight,
+    max_queue=settings.admission_max_queue,
+    queue_timeout=settings.admission_queue_timeout
+)
+rate_limiter = TokenBucketLimiter(
+    rate_per_minute=settings.rate_limit_per_minute,
+    burst=settings.rate_limit_burst
+) if settings.rate_limit_enabled else None
+
+def rejection_error(rejected: Rejected) -> HTTPException:
+    """Turn an admission rejection into an HTTP error with Retry-After."""
+    return HTTPException(
+        status_code=rejected.status_code,
+        detail=rejected.detail,
+        headers={"Retry-After": str(rejected.retry_after)}
+    )
+
+def check_rate_limit(request: Request) -> None:
+    """Apply the per-client token bucket before any work is done."""
+    if rate_limiter is None:
+        return
+    client = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if settings.rate_limit_trust_forwarded and forwarded:
+        # The last entry was added by our proxy; earlier ones can be set by the client
+        client = forwarded.split(",")[-1].strip()
+    try:
+        rate_limiter.check(client)
+    except Rejected as rejected:
+        raise rejection_error(rejected)
+
+async def admit_turn(session_id: str) -> Ticket:
+    """Wait for the session's previous turn and a free run slot."""
+    try:
+        with timed_stage("admission_wait"):
+            return await admission.admit(session_id)
+    except Rejected as rejected:
+        print(f"Rejected request for session {session_id}: {rejected.detail} {admission.stats()}")
+        raise rejection_error(rejected)
+
 class ChatResponse(BaseModel):
     respuesta: str
     session_id: str
 
+# Reject oversize uploads from the Content-Length header before the multipart body is parsed
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.max_request_bytes:
+        return JSONResponse(status_code=413, content={"detail": "Request body too large."})
+    return await call_next(request)
+
+# Tag every request with an ID for log correlation, and time it until its body is sent
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    request_id = (request.headers.get("x-request-id") or uuid.uuid4().hex)[:64]
+    request_id_var.set(request_id)
+    started = time.perf_counter()
+
+    def record(status_code: int) -> None:
+        elapsed = time.perf_counter() - started
+        # Label by route template so unknown paths do not create new series
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        REQUEST_SECONDS.observe(elapsed, method=request.method, path=path, status=str(status_code))
+        if settings.request_log_enabled and path != "/metrics":
+            log_event(
+                "http_request", method=request.method, path=path, status=status_code,
+                duration_ms=round(elapsed * 1000, 1)
+            )
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        record(500)
+        raise
+    response.headers["X-Request-ID"] = request_id
+
+    # call_next returns once headers are ready; a streamed answer is only done when its body is
+    body_iterator = response.body_iterator
+
+    async def timed_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            record(response.status_code)
+
+    response.body_iterator = timed_body()
+    return response
+
 # Exception handler for better error responses
 @app.exception_handler(422)
 async def validation_exception_handler(request: Request, exc):
@@ -103,100 +367,372 @@ async def validation_exception_handler(request: Request, exc):
         content={"detail": "Validation error. Please check your request format."}
     )
 
+async def prepare_input(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Compact a session history into the agent input.
+
+    Token counting covers every message, including extracted PDF text, so it runs
+    in a worker thread to keep the event loop free for other requests.
+    """
+    with timed_stage("history_compaction"):
+        return await asyncio.to_thread(compact_history, history, history_policy)
+
 async def process_uploaded_files(files: List[UploadFile]) -> tuple[List[Dict[str, Any]], List[str]]:
     """Process uploaded files and extract content."""
+    with timed_stage("process_uploaded_files"):
+        results = await attachment_processor.process(files)
+
+    for result in results:
+        observe_stage("upload_read", result.read_elapsed)
+        if not result.ok:
+            print(f"Error processing file {result.filename}: {result.error}")
+            if result.status_code == 500:
+                raise HTTPException(status_code=500, detail=f"Error processing file: {result.filename}")
+            raise HTTPException(status_code=result.status_code, detail=f"{result.error}: {result.filename}")
+        cache_status = "cache hit" if result.cached else "processed"
+        size_info = f"{result.size_bytes} -> {result.prepared_bytes} bytes" if result.kind == "image" else f"{result.size_bytes} bytes, {result.pages} pages"
+        print(f"Attachment {result.filename} ({result.kind}, {size_info}) {cache_status} in {result.elapsed:.2f}s")
+
+    user_message_content_parts = [r.content_part for r in results if r.content_part]
+    processed_files_info = [r.info for r in results if r.info]
+    return user_message_content_parts, processed_files_info
+
+async def build_user_turn(pregunta: str, files: List[UploadFile]) -> tuple[Dict[str, Any], str]:
+    """Build the user history entry and its log line from the request form."""
+    if not pregunta.strip() and not files:
+        raise HTTPException(status_code=400, detail="Question and files cannot both be empty.")
+
     user_message_content_parts = []
     processed_files_info = []
-    
-    allowed_types = ['pdf', 'jpg', 'jpeg', 'png', 'gif', 'webp']
-
-    for file_upload in files:
-        if not validate_file_type(file_upload.filename or "", allowed_types):
-            print(f"Warning: Unsupported file type: {file_upload.filename}")
-            continue
-        
-        try:
-            file_bytes = await file_upload.read()
-            await file_upload.close()
-
-            mime_type = file_upload.content_type or mimetypes.guess_type(file_upload.filename or "")[0] or "application/octet-stream"
-
-            if mime_type == "application/pdf":
-                pdf_reader = pypdf.PdfReader(io.BytesIO(file_bytes))
-                pdf_text = "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
-                user_message_content_parts.append({
-                    "type": "input_text", 
-                    "text": f'Contenido del PDF adjunto (\'{file_upload.filename}\'):\n---BEGIN PDF CONTENT---\n{pdf_text}\n---END PDF CONTENT---'
-                })
-                processed_files_info.append(f"Adjunto PDF: {file_upload.filename}")
-            elif mime_type.startswith("image/"):
-                base64_image = base64.b64encode(file_bytes).decode('utf-8')
-                user_message_content_parts.append({
-                    "type": "input_image",
-                    "image_url": f"data:{mime_type};base64,{base64_image}"                })
-                processed_files_info.append(f"Adjunto Imagen: {file_upload.filename}")
-        except Exception as e:
-            print(f"Error processing file {file_upload.filename}: {e}")
-            raise HTTPException(status_code=500, detail=f"Error processing file: {file_upload.filename}")
 
-    return user_message_content_parts, processed_files_info
+    if files:
+        user_message_content_parts, processed_files_info = await process_uploaded_files(files)
+
+    if pregunta.strip():
+        user_message_content_parts.insert(0, {"type": "input_text", "text": pregunta})
+
+    if not user_message_content_parts:
+        raise HTTPException(status_code=400, detail="No processable content in request.")
+
+    log_content = pregunta
+    if processed_files_info:
+        log_content += f" ({', '.join(processed_files_info)})"
+
+    return {"role": "user", "content": user_message_content_parts}, log_content
+
+def start_turn() -> float:
+    """Start collecting stage timings for a chat turn."""
+    turn_timings_var.set({})
+    return time.perf_counter()
+
+def finish_turn(
+    endpoint: str,
+    session_id: Optional[str],
+    agent: Optional[Agent],
+    outcome: str,
+    started: float,
+    tokens: Optional[Dict[str, int]] = None
+) -> None:
+    """Count a finished chat turn and log it with its stage timings."""
+    model = agent.model if agent else "none"
+    CHAT_TURNS.inc(endpoint=endpoint, model=model, outcome=outcome)
+    if settings.request_log_enabled:
+        stages = turn_timings_var.get() or {}
+        log_event(
+            "chat_turn", endpoint=endpoint, session_id=session_id, model=model, outcome=outcome,
+            duration_ms=round((time.perf_counter() - started) * 1000, 1),
+            stages_ms={stage: round(seconds * 1000, 1) for stage, seconds in stages.items()},
+            tokens=tokens
+        )
+
+def http_outcome(status_code: int) -> str:
+    """Turn outcome label for a request that ended in an HTTP error."""
+    if status_code in (429, 503):
+        return "rejected"
+    return "invalid" if status_code < 500 else "error"
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_endpoint_handler(
+    request: Request,
     pregunta: str = Form(""),
     session_id: Optional[str] = Form(None),
     files: List[UploadFile] = File(default=[])
 ):
+    ticket = None
+    agent = None
+    current_session_id = session_id
+    started = start_turn()
     try:
         print(f"Chat request received - session_id: {session_id}, files: {len(files) if files else 0}")
-        
-        if not pregunta.strip() and not files:
-            raise HTTPException(status_code=400, detail="Question and files cannot both be empty.")
-
-        user_message_content_parts = []
-        processed_files_info = []
-
-        if files:
-            user_message_content_parts, processed_files_info = await process_uploaded_files(files)
-
-        if pregunta.strip():
-            user_message_content_parts.insert(0, {"type": "input_text", "text": pregunta})
-
-        if not user_message_content_parts:
-            raise HTTPException(status_code=400, detail="No processable content in request.")
+        check_rate_limit(request)
 
         current_session_id = session_id or generate_session_id()
-        current_history = session_histories.setdefault(current_session_id, [])
+        # Admitted before attachments are processed so a session's turns keep their arrival order
+        ticket = await admit_turn(current_session_id)
+
+        user_message, log_content = await build_user_turn(pregunta, files)
+
+        with timed_stage("session_load"):
+            current_history = await session_store.get(current_session_id)
+        cache_question = cacheable_question(pregunta, files, current_history)
+        agent = select_agent(current_session_id, pregunta, files, current_history)
+        coalesce_key = coalescing_key(pregunta, files, current_history, agent)
+
+        current_history.append(user_message)
+
+        log_to_supabase(current_session_id, "user", log_content)
+
+        tokens = None
+        outcome = "answered"
+        cached_answer, embedding = await answer_cache.lookup(cache_question) if cache_question else (None, None)
+        if cached_answer is not None:
+            respuesta_limpia = cached_answer
+            outcome = "cached"
+        elif coalesce_key:
+            flight, leader = single_flight.join(
+                coalesce_key,
+                lambda flight: run_agent_flight(flight, agent, current_history, cache_question, embedding)
+            )
+            if leader:
+                respuesta_limpia = await flight.result()
+                tokens = flight.tokens
+            else:
+                with timed_stage("coalesced_wait"):
+                    respuesta_limpia = await flight.result()
+                outcome = "coalesced"
+        else:
+            agent_input = await prepare_input(current_history)
+            with timed_stage("agent_run"):
+                result = await Runner.run(agent, agent_input)
+            tokens = record_usage(agent.model, result.context_wrapper.usage)
+            respuesta_limpia = extract_text_from_content(result.final_output)
+            if cache_question:
+                await answer_cache.store(cache_question, respuesta_limpia, embedding)
+
+        log_to_supabase(current_session_id, "assistant", respuesta_limpia)
+
+        with timed_stage("session_save"):
+            await session_store.append(
+                current_session_id,
+                user_message,
+                {"role": "assistant", "content": respuesta_limpia}
+            )
+
+        finish_turn("chat", current_session_id, agent, outcome, started, tokens)
+        return ChatResponse(respuesta=respuesta_limpia, session_id=current_session_id)
+
+    except HTTPException as e:
+        finish_turn("chat", current_session_id, agent, http_outcome(e.status_code), started)
+        raise
+    except Exception as e:
+        print(f"Unexpected error in chat endpoint: {str(e)}")
+        finish_turn("chat", current_session_id, agent, "error", started)
+        raise HTTPException(status_code=500, detail="An internal error occurred.")
+    finally:
+        if ticket:
+            ticket.release()
+
+# User-facing progress messages for tool calls made during a streamed run
+TOOL_STATUS_MESSAGES = {
+    "file_search_call": ("file_search", "Buscando en los materiales del curso..."),
+    "file_search": ("file_search", "Buscando en los materiales del curso..."),
+}
+
+def describe_tool_call(item: Any) -> Dict[str, str]:
+    """Describe a tool call run item as a progress event payload."""
+    raw_item = getattr(item, "raw_item", None)
+    raw_type = getattr(raw_item, "type", None) or "tool_call"
+    if raw_type == "function_call":
+        raw_type = getattr(raw_item, "name", None) or raw_type
+    tool, message = TOOL_STATUS_MESSAGES.get(raw_type, (raw_type, "Consultando herramientas..."))
+    return {"tool": tool, "message": message}
+
+async def run_agent_flight(
+    flight: Flight,
+    agent: Agent,
+    turn_input: List[Dict[str, Any]],
+    cache_question: Optional[str] = None,
+    embedding: Optional[List[float]] = None
+) -> tuple[str, Dict[str, int]]:
+    """Run the agent in streaming mode, publishing progress events to the flight's subscribers."""
+    agent_input = await prepare_input(turn_input)
+    run_started = time.perf_counter()
+    # Hosted file search runs inside the model response; time it from its stream events
+    search_started: Dict[str, float] = {}
+    result = Runner.run_streamed(agent, agent_input)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event":
+            data_type = getattr(event.data, "type", None)
+            if data_type == "response.output_text.delta":
+                flight.publish("delta", {"text": event.data.delta})
+            elif data_type == "response.file_search_call.in_progress":
+                search_started[event.data.item_id] = time.perf_counter()
+            elif data_type == "response.file_search_call.completed" and event.data.item_id in search_started:
+                observe_stage("tool_file_search", time.perf_counter() - search_started.pop(event.data.item_id))
+        elif event.type == "run_item_stream_event" and event.name == "tool_called":
+            flight.publish("tool", describe_tool_call(event.item))
+    observe_stage("agent_run", time.perf_counter() - run_started)
+    tokens = record_usage(agent.model, result.context_wrapper.usage)
+    answer = extract_text_from_content(result.final_output)
+    if cache_question:
+        await answer_cache.store(cache_question, answer, embedding)
+    return answer, tokens
+
+async def stream_chat_events(
+    session_id: str,
+    user_message: Dict[str, Any],
+    log_content: str,
+    turn_input: List[Dict[str, Any]],
+    agent: Agent,
+    ticket: Ticket,
+    cache_question: Optional[str] = None,
+    started: Optional[float] = None,
+    coalesce_key: Optional[str] = None
+) -> AsyncIterator[str]:
+    """Run the agent in streaming mode and yield Server-Sent Events."""
+    try:
+        async for event in _stream_chat_events(
+            session_id, user_message, log_content, turn_input, agent, cache_question, started, coalesce_key
+        ):
+            yield event
+    finally:
+        ticket.release()
+
+async def _stream_chat_events(
+    session_id: str,
+    user_message: Dict[str, Any],
+    log_content: str,
+    turn_input: List[Dict[str, Any]],
+    agent: Agent,
+    cache_question: Optional[str] = None,
+    started: Optional[float] = None,
+    coalesce_key: Optional[str] = None
+) -> AsyncIterator[str]:
+    if started is None:
+        started = start_turn()
+    yield format_sse("session", {"session_id": session_id})
+
+    tokens = None
+    outcome = "answered"
+    try:
+        cached_answer, embedding = await answer_cache.lookup(cache_question) if cache_question else (None, None)
+        if cached_answer is not None:
+            respuesta_limpia = cached_answer
+            outcome = "cached"
+            yield format_sse("delta", {"text": cached_answer})
+        else:
+            # Without a key the run is private; with one, identical questions already in flight share it
+            flight, leader = single_flight.join(
+                coalesce_key,
+                lambda flight: run_agent_flight(flight, agent, turn_input, cache_question, embedding)
+            )
+            wait_started = time.perf_counter()
+            async for event, payload in flight.subscribe():
+                yield format_sse(event, payload)
+            respuesta_limpia = flight.answer
+            if leader:
+                tokens = flight.tokens
+            else:
+                observe_stage("coalesced_wait", time.perf_counter() - wait_started)
+                outcome = "coalesced"
+    except Exception as e:
+        print(f"Unexpected error in chat stream: {str(e)}")
+        finish_turn("stream", session_id, agent, "error", started, tokens)
+        yield format_sse("error", {"detail": "An internal error occurred."})
+        return
 
-        current_history.append({"role": "user", "content": user_message_content_parts})
+    # Only a completed turn is committed to history and logs
+    with timed_stage("session_save"):
+        await session_store.append(session_id, user_message, {"role": "assistant", "content": respuesta_limpia})
 
-        log_content = pregunta
-        if processed_files_info:
-            log_content += f" ({', '.join(processed_files_info)})"
+    log_to_supabase(session_id, "user", log_content)
+    log_to_supabase(session_id, "assistant", respuesta_limpia)
 
-        await log_to_supabase(current_session_id, "user", log_content)
+    finish_turn("stream", session_id, agent, outcome, started, tokens)
+    yield format_sse("done", {"respuesta": respuesta_limpia, "session_id": session_id})
 
-        result = await Runner.run(isst_agent, current_history)
-        respuesta_limpia = extract_text_from_content(result.final_output)
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint_handler(
+    request: Request,
+    pregunta: str = Form(""),
+    session_id: Optional[str] = Form(None),
+    files: List[UploadFile] = File(default=[])
+):
+    print(f"Chat stream request received - session_id: {session_id}, files: {len(files) if files else 0}")
+    started = start_turn()
+    try:
+        check_rate_limit(request)
+        current_session_id = session_id or generate_session_id()
+        # Admitted before streaming starts so overload is reported as a 429/503 status, and
+        # before attachments are processed so a session's turns keep their arrival order
+        ticket = await admit_turn(current_session_id)
+    except HTTPException as e:
+        finish_turn("stream", session_id, None, http_outcome(e.status_code), started)
+        raise
+    try:
+        user_message, log_content = await build_user_turn(pregunta, files)
+        with timed_stage("session_load"):
+            history = await session_store.get(current_session_id)
+        cache_question = cacheable_question(pregunta, files, history)
+        agent = select_agent(current_session_id, pregunta, files, history)
+        coalesce_key = coalescing_key(pregunta, files, history, agent)
+    except HTTPException as e:
+        ticket.release()
+        finish_turn("stream", current_session_id, None, http_outcome(e.status_code), started)
+        raise
+    except BaseException:
+        ticket.release()
+        raise
 
-        await log_to_supabase(current_session_id, "assistant", respuesta_limpia)
+    return StreamingResponse(
+        stream_chat_events(
+            current_session_id, user_message, log_content, history + [user_message], agent, ticket,
+            cache_question, started, coalesce_key
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also released here in case the client disconnects before the stream starts
+        background=BackgroundTask(ticket.release)
+    )
 
-        current_history.append({"role": "assistant", "content": respuesta_limpia})
+@app.get("/live")
+async def liveness_check():
+    """The process is up and serving requests."""
+    return {"status": "alive"}
 
-        return ChatResponse(respuesta=respuesta_limpia, session_id=current_session_id)
+@app.get("/ready")
+async def readiness_check():
+    """Whether this instance should receive traffic, from the cached probe results."""
+    ready = health_monitor.ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "dependencies": health_monitor.snapshot()}
+    )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Unexpected error in chat endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail="An internal error occurred.")
+if settings.metrics_enabled:
+    @app.get("/metrics")
+    async def metrics_endpoint():
+        """Prometheus metrics, with load gauges read at scrape time."""
+        SESSIONS.set(await session_store.size())
+        IN_FLIGHT.set(admission.in_flight)
+        QUEUED.set(admission.waiting)
+        LOG_BACKLOG.set(chat_log_writer.stats()["pending"])
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/api/health")
 async def health_check():
     return {
-        "status": "healthy",
+        "status": "healthy" if health_monitor.healthy() else "degraded",
+        "dependencies": health_monitor.snapshot(),
         "version": "1.0.0",
-        "vector_store_id": settings.vector_store_id
+        "vector_store_id": settings.vector_store_id,
+        "chat_logs": chat_log_writer.stats(),
+        "sessions": await session_store.size(),
+        "attachment_cache": attachment_processor.cache.stats() if attachment_processor.cache else None,
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "search_cache": search_cache.stats() if search_cache else None,
+        "model_routing": model_router.stats() if model_router else None,
+        "coalescing": single_flight.stats() if settings.coalescing_enabled else None,
+        "admission": dict(admission.stats(), rate_limited=rate_limiter.limited if rate_limiter else 0)
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,311 @@
+"""
+Attachment processing pipeline for the ISST AI Tutor backend.
+Extracts PDF text and encodes images in a worker pool, one task per file.
+"""
+
+import asyncio
+import base64
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import UploadFile
+
+from file_cache import AttachmentCache
+from image_prep import prepare_image
+from utils import validate_file_type
+
+
+ALLOWED_FILE_TYPES = ['pdf', 'jpg', 'jpeg', 'png', 'gif', 'webp']
+
+INGEST_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the per-file size cap."""
+
+
+@dataclass
+class AttachmentResult:
+    """Outcome of processing a single uploaded file."""
+
+    filename: str
+    kind: str
+    size_bytes: int = 0
+    sha256: Optional[str] = None
+    cached: bool = False
+    prepared_bytes: int = 0
+    content_part: Optional[Dict[str, Any]] = None
+    info: Optional[str] = None
+    pages: int = 0
+    truncated: bool = False
+    read_elapsed: float = 0.0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    status_code: int = 200
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def hash_stream(stream: BinaryIO, max_bytes: int, chunk_size: int = INGEST_CHUNK_SIZE) -> Tuple[int, str]:
+    """Hash a file object chunk by chunk, stopping as soon as it exceeds `max_bytes`.
+
+    Returns the size and the hex SHA-256 digest, and rewinds the stream.
+    """
+    stream.seek(0)
+    hasher = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit")
+        hasher.update(chunk)
+    stream.seek(0)
+    return size, hasher.hexdigest()
+
+
+def spool_to_disk(stream: BinaryIO, suffix: str = "", chunk_size: int = INGEST_CHUNK_SIZE) -> str:
+    """Copy a file object to a named temporary file in chunks and return its path."""
+    stream.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        shutil.copyfileobj(stream, tmp, chunk_size)
+    return tmp.name
+
+
+def read_stream(stream: BinaryIO) -> bytes:
+    """Read a whole file object from the start."""
+    stream.seek(0)
+    return stream.read()
+
+
+def extract_pdf_text(source: Union[str, BinaryIO], max_pages: int) -> Tuple[str, int, int]:
+    """Extract text from the first `max_pages` pages of a PDF file path or stream.
+
+    Returns the text, the number of pages read and the total page count.
+    Runs in a worker, so it must stay a picklable module-level function.
+    """
+    import pypdf
+
+    if isinstance(source, str):
+        # pypdf would load a path fully into memory, so hand it an open file instead
+        with open(source, "rb") as f:
+            return extract_pdf_text(f, max_pages)
+
+    reader = pypdf.PdfReader(source)
+    total_pages = len(reader.pages)
+    pages_to_read = min(total_pages, max_pages) if max_pages > 0 else total_pages
+    text = "\n".join(reader.pages[i].extract_text() or "" for i in range(pages_to_read))
+    return text, pages_to_read, total_pages
+
+
+def encode_image(data: bytes) -> str:
+    """Base64-encode image bytes."""
+    return base64.b64encode(data).decode('utf-8')
+
+
+def format_pdf_part(filename: str, text: str) -> Dict[str, Any]:
+    """Wrap extracted PDF text as a model input part."""
+    return {
+        "type": "input_text",
+        "text": f'Contenido del PDF adjunto (\'{filename}\'):\n---BEGIN PDF CONTENT---\n{text}\n---END PDF CONTENT---'
+    }
+
+
+class AttachmentProcessor:
+    """Processes uploaded files concurrently without blocking the event loop."""
+
+    def __init__(
+        self,
+        executor_kind: str = "process",
+        max_workers: Optional[int] = None,
+        max_concurrency: int = 4,
+        max_file_bytes: int = 20 * 1024 * 1024,
+        max_pdf_pages: int = 100,
+        timeout: float = 30.0,
+        cache: Optional[AttachmentCache] = None,
+        image_max_side: int = 2048,
+        image_format: str = "webp",
+        image_quality: int = 85,
+    ):
+        self._executor_kind = executor_kind
+        self._max_workers = max_workers
+        self._max_concurrency = max(1, max_concurrency)
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pool_slots: Optional[asyncio.Semaphore] = None
+        self.max_file_bytes = max_file_bytes
+        self.max_pdf_pages = max_pdf_pages
+        self.timeout = timeout
+        self.cache = cache
+        self.image_max_side = image_max_side
+        self.image_format = image_format
+        self.image_quality = image_quality
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="attachments")
+        return self._executor
+
+    @property
+    def pool_size(self) -> int:
+        """Number of workers in the pool, with the executors' defaults when unset."""
+        if self._max_workers:
+            return self._max_workers
+        cpus = os.cpu_count() or 1
+        return cpus if self._executor_kind == "process" else min(32, cpus + 4)
+
+    async def _run_in_pool(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a job in the worker pool, waiting at most `timeout` for a free worker and the result.
+
+        Workers cannot be interrupted, so a job that times out keeps running and keeps
+        its slot until it finishes. New jobs wait for a slot (and time out) instead of
+        queueing behind runaway work in the executor.
+        """
+        if self._pool_slots is None:
+            self._pool_slots = asyncio.Semaphore(self.pool_size)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        await asyncio.wait_for(self._pool_slots.acquire(), self.timeout)
+        try:
+            future = loop.run_in_executor(self._get_executor(), func, *args)
+        except BaseException:
+            self._pool_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._pool_slots.release())
+        # Shielded so a timeout stops the wait without releasing the slot of a job that is still running
+        return await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - loop.time()))
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def process(self, files: List[UploadFile]) -> List[AttachmentResult]:
+        """Process every supported file concurrently, preserving upload order."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        supported = []
+        for file_upload in files:
+            if not validate_file_type(file_upload.filename or "", ALLOWED_FILE_TYPES):
+                print(f"Warning: Unsupported file type: {file_upload.filename}")
+                continue
+            supported.append(file_upload)
+
+        return list(await asyncio.gather(*(self._process_one(f) for f in supported)))
+
+    async def _process_one(self, file_upload: UploadFile) -> AttachmentResult:
+        filename = file_upload.filename or ""
+        mime_type = file_upload.content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        kind = "pdf" if mime_type == "application/pdf" else "image" if mime_type.startswith("image/") else "other"
+        result = AttachmentResult(filename=filename, kind=kind)
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                # Starlette has already spooled the upload; hash it in chunks without copying it into memory
+                result.size_bytes, result.sha256 = await asyncio.to_thread(
+                    hash_stream, file_upload.file, self.max_file_bytes
+                )
+                result.read_elapsed = loop.time() - started
+
+                if kind == "pdf":
+                    payload = await self._cached(
+                        f"{result.sha256}:pdf:{self.max_pdf_pages}", result, lambda: self._extract_pdf(file_upload.file)
+                    )
+                    text = payload["text"]
+                    result.pages = payload["pages"]
+                    result.truncated = payload["pages"] < payload["total_pages"]
+                    if result.truncated:
+                        text += f"\n[... {payload['total_pages'] - payload['pages']} páginas adicionales omitidas ...]"
+                    result.content_part = format_pdf_part(filename, text)
+                    result.info = f"Adjunto PDF: {filename}"
+                elif kind == "image":
+                    image_key = f"{result.sha256}:image:{self.image_max_side}:{self.image_format}:{self.image_quality}"
+                    payload = await self._cached(
+                        image_key, result, lambda: self._prepare_image(file_upload.file, mime_type)
+                    )
+                    result.prepared_bytes = payload["prepared_bytes"]
+                    result.content_part = {
+                        "type": "input_image",
+                        "image_url": f"data:{payload['mime_type']};base64,{payload['data']}"
+                    }
+                    result.info = f"Adjunto Imagen: {filename}"
+            except UploadTooLarge as e:
+                result.error = str(e)
+                result.status_code = 413
+            except asyncio.TimeoutError:
+                result.error = f"Processing timed out after {self.timeout}s"
+                result.status_code = 504
+            except Exception as e:
+                result.error = str(e)
+                result.status_code = 500
+            finally:
+                await file_upload.close()
+            result.elapsed = loop.time() - started
+
+        return result
+
+    async def _cached(
+        self,
+        key: str,
+        result: AttachmentResult,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Return a prepared payload from the cache, computing and storing it on a miss."""
+        if self.cache is not None:
+            payload = await self.cache.get(key)
+            if payload is not None:
+                result.cached = True
+                return payload
+        payload = await compute()
+        if self.cache is not None:
+            await self.cache.put(key, payload)
+        return payload
+
+    async def _extract_pdf(self, stream: BinaryIO) -> Dict[str, Any]:
+        if self._executor_kind == "thread":
+            source: Union[str, BinaryIO] = stream
+            spooled_path = None
+        else:
+            # Worker processes cannot share the upload's file object, so pass a path instead
+            spooled_path = await asyncio.to_thread(spool_to_disk, stream, ".pdf")
+            source = spooled_path
+        try:
+            text, pages, total_pages = await self._run_in_pool(extract_pdf_text, source, self.max_pdf_pages)
+        finally:
+            if spooled_path:
+                os.unlink(spooled_path)
+        return {"text": text, "pages": pages, "total_pages": total_pages}
+
+    async def _prepare_image(self, stream: BinaryIO, mime_type: str) -> Dict[str, Any]:
+        file_bytes = await asyncio.to_thread(read_stream, stream)
+        # Pillow releases the GIL while resampling and encoding, and a process pool would pay twice for pickling
+        prepared, prepared_mime_type = await asyncio.wait_for(
+            asyncio.to_thread(
+                prepare_image, file_bytes, mime_type, self.image_max_side, self.image_format, self.image_quality
+            ),
+            self.timeout
+        )
+        data = await asyncio.to_thread(encode_image, prepared)
+        return {
+            "data": data,
+            "mime_type": prepared_mime_type,
+            "original_bytes": len(file_bytes),
+            "prepared_bytes": len(prepared),
+        }
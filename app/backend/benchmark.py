@@ -0,0 +1,360 @@
+"""
+Load-test and latency benchmark for the ISST AI Tutor backend.
+Runs app.py in-process with stub OpenAI agent and Supabase implementations
+and drives it with concurrent simulated students.
+
+Usage:
+    python benchmark.py --students 50 --requests 5 --agent-latency 1.5
+    python benchmark.py --mix text=0.6,pdf=0.3,image=0.1 --stream --json results.json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import resource
+import socket
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse a request mix such as 'text=0.7,pdf=0.2,image=0.1'."""
+    mix = {}
+    for item in value.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in ("text", "pdf", "image"):
+            raise argparse.ArgumentTypeError(f"Unknown request kind: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+class FakeSupabase:
+    """Stand-in for the Supabase client with a fixed, blocking round trip."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.rows = 0
+
+    def table(self, name: str) -> "FakeSupabase":
+        return self
+
+    def insert(self, rows: Any) -> "FakeSupabase":
+        self.rows += len(rows) if isinstance(rows, list) else 1
+        return self
+
+    def select(self, *args: Any) -> "FakeSupabase":
+        return self
+
+    def limit(self, count: int) -> "FakeSupabase":
+        return self
+
+    def execute(self) -> SimpleNamespace:
+        time.sleep(self.latency)
+        return SimpleNamespace(data=[])
+
+
+class FakeStreamedRun:
+    """Stand-in for the agents streaming result."""
+
+    def __init__(self, latency: float, answer: str, chunks: int = 20):
+        self._latency = latency
+        self._answer = answer
+        self._chunks = chunks
+        self.final_output: Optional[str] = None
+        self.context_wrapper = fake_context(answer)
+
+    async def stream_events(self):
+        yield SimpleNamespace(
+            type="run_item_stream_event", name="tool_called",
+            item=SimpleNamespace(raw_item=SimpleNamespace(type="file_search_call"))
+        )
+        step = max(1, len(self._answer) // self._chunks)
+        for start in range(0, len(self._answer), step):
+            await asyncio.sleep(self._latency / self._chunks)
+            yield SimpleNamespace(
+                type="raw_response_event",
+                data=SimpleNamespace(type="response.output_text.delta", delta=self._answer[start:start + step])
+            )
+        self.final_output = self._answer
+
+
+def fake_context(answer: str) -> SimpleNamespace:
+    """Run context with token usage, as read by the metrics."""
+    return SimpleNamespace(usage=SimpleNamespace(input_tokens=1200, output_tokens=len(answer) // 4))
+
+
+def install_stubs(agent_latency: float, supabase_latency: float) -> FakeSupabase:
+    """Patch the Supabase client factory and the agents runner before app.py is imported."""
+    import supabase
+    import agents
+
+    fake_supabase = FakeSupabase(supabase_latency)
+    supabase.create_client = lambda *args, **kwargs: fake_supabase
+    answer = "Respuesta simulada del asistente. " * 20
+
+    async def fake_run(agent: Any, input: Any, **kwargs: Any) -> SimpleNamespace:
+        await asyncio.sleep(agent_latency)
+        return SimpleNamespace(final_output=answer, context_wrapper=fake_context(answer))
+
+    agents.Runner.run = staticmethod(fake_run)
+    agents.Runner.run_streamed = staticmethod(lambda agent, input, **kwargs: FakeStreamedRun(agent_latency, answer))
+    return fake_supabase
+
+
+def build_sample_files(pdf_path: Optional[str], pdf_pages: int) -> Dict[str, bytes]:
+    """Load or generate the PDF and image attached by simulated students."""
+    from PIL import Image, ImageDraw
+
+    if pdf_path:
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+    else:
+        pages = []
+        for number in range(pdf_pages):
+            page = Image.new("RGB", (1240, 1754), "white")
+            ImageDraw.Draw(page).text((100, 100), f"Tema {number + 1}: patrones de diseño", fill="black")
+            pages.append(page)
+        buffer = io.BytesIO()
+        pages[0].save(buffer, format="PDF", save_all=True, append_images=pages[1:])
+        pdf_bytes = buffer.getvalue()
+
+    photo = Image.effect_noise((3024, 4032), 64).convert("RGB")
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=90)
+    return {"pdf": pdf_bytes, "image": buffer.getvalue()}
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag and process RSS while the benchmark runs."""
+
+    def __init__(self, interval: float = 0.01, rss_interval: float = 1.0):
+        self.interval = interval
+        self.rss_interval = rss_interval
+        self.lags: List[float] = []
+        self.rss: List[Dict[str, float]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        next_rss = started
+        while True:
+            before = loop.time()
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self.lags.append(max(0.0, now - before - self.interval))
+            if now >= next_rss:
+                self.rss.append({"t": round(now - started, 2), "rss_mb": round(current_rss_mb(), 1)})
+                next_rss = now + self.rss_interval
+
+
+async def simulate_student(
+    client: Any,
+    student: int,
+    args: argparse.Namespace,
+    files: Dict[str, bytes],
+    results: List[Dict[str, Any]],
+) -> None:
+    """Send a student's requests one after another on a single session."""
+    rng = random.Random(args.seed + student)
+    kinds, weights = zip(*args.mix.items())
+    session_id = None
+    path = "/api/chat/stream" if args.stream else "/api/chat"
+
+    for number in range(args.requests):
+        kind = rng.choices(kinds, weights)[0]
+        data = {"pregunta": f"Pregunta {number} del estudiante {student} sobre el patrón MVC"}
+        if session_id:
+            data["session_id"] = session_id
+        upload = []
+        if kind == "pdf":
+            upload = [("files", ("apuntes.pdf", files["pdf"], "application/pdf"))]
+        elif kind == "image":
+            upload = [("files", ("pizarra.jpg", files["image"], "image/jpeg"))]
+
+        started = time.perf_counter()
+        first_byte = None
+        status = 0
+        try:
+            async with client.stream("POST", path, data=data, files=upload or None) as response:
+                status = response.status_code
+                body = b""
+                async for chunk in response.aiter_bytes():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                    body += chunk
+            if status == 200 and not args.stream:
+                session_id = json.loads(body)["session_id"]
+            elif status == 200 and session_id is None:
+                first_event = body.split(b"\n\n", 1)[0].split(b"data: ", 1)[1]
+                session_id = json.loads(first_event)["session_id"]
+        except Exception as e:
+            print(f"Request failed for student {student}: {e}", file=sys.stderr)
+        results.append({
+            "kind": kind,
+            "status": status,
+            "latency": time.perf_counter() - started,
+            "ttfb": first_byte,
+        })
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max in milliseconds."""
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p95_ms": round(percentile(values, 95) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1),
+        "max_ms": round(max(values, default=0.0) * 1000, 1),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the app on a local port, run the simulated students and collect metrics."""
+    import httpx
+    import uvicorn
+
+    fake_supabase = install_stubs(args.agent_latency, args.supabase_latency)
+    import app as backend
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(backend.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    files = build_sample_files(args.pdf, args.pdf_pages)
+    monitor = LoopLagMonitor()
+    monitor.start()
+    results: List[Dict[str, Any]] = []
+
+    limits = httpx.Limits(max_connections=args.students)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            simulate_student(client, student, args, files, results) for student in range(args.students)
+        ))
+        elapsed = time.perf_counter() - started
+
+    await monitor.stop()
+    server.should_exit = True
+    await server_task
+
+    ok = [r for r in results if r["status"] == 200]
+    report: Dict[str, Any] = {
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "statuses": {str(status): sum(1 for r in results if r["status"] == status) for status in sorted({r["status"] for r in results})},
+        "duration_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency": summarize([r["latency"] for r in ok]),
+        "by_kind": {
+            kind: summarize([r["latency"] for r in ok if r["kind"] == kind])
+            for kind in args.mix if any(r["kind"] == kind for r in ok)
+        },
+        "event_loop_lag": summarize(monitor.lags),
+        "rss_mb": monitor.rss,
+        "supabase_rows": fake_supabase.rows,
+    }
+    if args.stream:
+        report["time_to_first_byte"] = summarize([r["ttfb"] for r in ok if r["ttfb"] is not None])
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a human-readable benchmark summary."""
+    def line(label: str, stats: Dict[str, float]) -> str:
+        return f"{label:<22} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms  max {stats['max_ms']:>8} ms"
+
+    print("=" * 90)
+    print("📊 BENCHMARK SUMMARY")
+    print("=" * 90)
+    print(f"Requests: {report['requests']}  Errors: {report['errors']}  "
+          f"Duration: {report['duration_s']} s  Throughput: {report['throughput_rps']} req/s")
+    print("Status codes: " + "  ".join(f"{status}: {count}" for status, count in report["statuses"].items()))
+    print(line("Latency (all)", report["latency"]))
+    for kind, stats in report["by_kind"].items():
+        print(line(f"Latency ({kind})", stats))
+    if "time_to_first_byte" in report:
+        print(line("Time to first byte", report["time_to_first_byte"]))
+    print(line("Event-loop lag", report["event_loop_lag"]))
+    rss = [sample["rss_mb"] for sample in report["rss_mb"]]
+    if rss:
+        print(f"RSS: start {rss[0]} MB, peak {max(rss)} MB, end {rss[-1]} MB ({len(rss)} samples)")
+    print("=" * 90)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the chat backend with stub OpenAI and Supabase clients.")
+    parser.add_argument("--students", type=int, default=20, help="Concurrent simulated students.")
+    parser.add_argument("--requests", type=int, default=5, help="Requests sent by each student.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("text=0.7,pdf=0.2,image=0.1"),
+                        help="Request mix, e.g. text=0.7,pdf=0.2,image=0.1.")
+    parser.add_argument("--agent-latency", type=float, default=1.0, help="Seconds taken by the stub agent run.")
+    parser.add_argument("--supabase-latency", type=float, default=0.1, help="Seconds taken by each stub Supabase insert.")
+    parser.add_argument("--stream", action="store_true", help="Use /api/chat/stream instead of /api/chat.")
+    parser.add_argument("--pdf", help="PDF to attach (a synthetic one is generated by default).")
+    parser.add_argument("--pdf-pages", type=int, default=30, help="Pages in the synthetic PDF.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request client timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the request mix.")
+    parser.add_argument("--json", help="Write the full report to this JSON file.")
+    args = parser.parse_args()
+
+    # The app reads .env and system_prompt.txt from the backend directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.getcwd())
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("VECTOR_STORE_ID", "vs_benchmark")
+    os.environ.setdefault("SUPABASE_URL", "https://benchmark.supabase.co")
+    os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+    # Cached answers would hide the request path being measured
+    os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+    # Every simulated student shares one address, so per-client limits would throttle the whole run
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    # Per-request JSON log lines would flood the report output
+    os.environ.setdefault("REQUEST_LOG_ENABLED", "false")
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
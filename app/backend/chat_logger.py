@@ -0,0 +1,143 @@
+"""
+Background chat log writer for the ISST AI Tutor backend.
+Buffers chat log rows in a bounded queue and flushes them to Supabase in batches.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from metrics import timed_stage
+
+
+_STOP = object()
+
+
+class ChatLogWriter:
+    """Non-blocking, batched writer for the `chat_logs` table."""
+
+    def __init__(
+        self,
+        supabase_client: Any,
+        table: str = "chat_logs",
+        max_queue_size: int = 1000,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+    ):
+        self._client = supabase_client
+        self._table = table
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval
+        self._max_queue_size = max(1, max_queue_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._closing = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the background flush worker on the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+            self._stopping = False
+            self._closing = False
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush every pending row and stop the worker, giving up after `timeout` seconds."""
+        if self._worker is None:
+            return
+        # Refuse new rows so the stop marker is not starved by producers
+        self._closing = True
+
+        async def drain() -> None:
+            # The queue may be full while Supabase is slow, so the put is under the timeout too
+            await self._queue.put(_STOP)
+            await self._worker
+
+        try:
+            await asyncio.wait_for(drain(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Warning: chat log writer did not drain within {timeout}s")
+            self._worker.cancel()
+        self._worker = None
+
+    def log(self, session_id: str, role: str, content: str) -> bool:
+        """Queue a chat log row without waiting. Returns False if it was dropped."""
+        row = {"session_id": session_id, "role": role, "content": content}
+        if self._queue is None or self._stopping or self._closing:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Return writer counters."""
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "pending": self._queue.qsize() if self._queue else 0,
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        first = await self._queue.get()
+        if first is _STOP:
+            self._stopping = True
+            return self._drain_nowait()
+
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._flush_interval
+        while len(batch) < self._batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                self._stopping = True
+                batch.extend(self._drain_nowait())
+                break
+            batch.append(item)
+        return batch
+
+    def _drain_nowait(self) -> List[Dict[str, Any]]:
+        rows = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return rows
+            if item is not _STOP:
+                rows.append(item)
+
+    async def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(rows), self._batch_size):
+            chunk = rows[start:start + self._batch_size]
+            try:
+                with timed_stage("log_write"):
+                    await asyncio.to_thread(self._insert, chunk)
+                self.written += len(chunk)
+            except Exception as e:
+                self.failed += len(chunk)
+                print(f"Error logging {len(chunk)} rows to Supabase: {e}")
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        self._client.table(self._table).insert(rows).execute()
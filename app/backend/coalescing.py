@@ -0,0 +1,130 @@
+"""
+Request coalescing for the ISST AI Tutor backend.
+Identical first-turn questions that arrive while an answer is being generated share
+one agent run; every waiter receives the same stream events and final answer.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from answer_cache import normalize_question
+
+
+class FlightFailed(Exception):
+    """The shared agent run failed or was cancelled."""
+
+
+class Flight:
+    """One agent run shared by its subscribers, with its events buffered for late joiners."""
+
+    def __init__(self, key: Optional[str]):
+        self.key = key
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.answer: Optional[str] = None
+        self.tokens: Optional[Dict[str, int]] = None
+        self.error: Optional[FlightFailed] = None
+        self.done = False
+        self.abandoned = False
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def publish(self, event: str, payload: Dict[str, Any]) -> None:
+        """Send a progress event to current and future subscribers."""
+        self.events.append((event, payload))
+        self._notify()
+
+    def finish(self, answer: str, tokens: Optional[Dict[str, int]] = None) -> None:
+        self.answer, self.tokens, self.done = answer, tokens, True
+        self._notify()
+
+    def fail(self, error: FlightFailed) -> None:
+        self.error, self.done = error, True
+        self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield every event from the start of the run until it finishes.
+
+        Raises FlightFailed if the run fails. The run is cancelled once its last
+        subscriber leaves before it finishes.
+        """
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(self.events):
+                    yield self.events[index]
+                    index += 1
+                if self.done:
+                    break
+                await self._changed.wait()
+            if self.error:
+                raise self.error
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self._task:
+                self.abandoned = True
+                self._task.cancel()
+
+    async def result(self) -> str:
+        """Wait for the final answer."""
+        async for _ in self.subscribe():
+            pass
+        return self.answer
+
+
+FlightRun = Callable[[Flight], Awaitable[Tuple[str, Optional[Dict[str, int]]]]]
+
+
+class SingleFlight:
+    """Runs at most one agent call per key at a time and shares it with identical requests."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._flights: Dict[str, Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def key(self, question: str, model: str) -> str:
+        """Key a first-turn question by prompt namespace, model and normalized text."""
+        return f"{self.namespace}:{model}:{normalize_question(question)}"
+
+    def join(self, key: Optional[str], run: FlightRun) -> Tuple[Flight, bool]:
+        """Join the run in flight for `key`, or start `run` in the background.
+
+        Returns the flight and whether this caller started it. A None key starts
+        a private run that nobody else can join.
+        """
+        flight = self._flights.get(key) if key is not None else None
+        if flight is not None and not flight.abandoned:
+            self.followers += 1
+            return flight, False
+
+        flight = Flight(key)
+        if key is not None:
+            self._flights[key] = flight
+            self.leaders += 1
+        flight._task = asyncio.create_task(self._run(flight, run))
+        return flight, True
+
+    async def _run(self, flight: Flight, run: FlightRun) -> None:
+        try:
+            answer, tokens = await run(flight)
+        except asyncio.CancelledError:
+            flight.fail(FlightFailed("Agent run cancelled"))
+            raise
+        except Exception as e:
+            flight.fail(FlightFailed(str(e)))
+        else:
+            flight.finish(answer, tokens)
+        finally:
+            if flight.key is not None and self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return coalescing counters."""
+        return {"in_flight": len(self._flights), "leaders": self.leaders, "followers": self.followers}
@@ -3,6 +3,7 @@ Configuration management for the ISST AI Tutor application.
 Centralizes all configuration values and environment variables.
 """
 
+from functools import lru_cache
 from typing import Optional, List
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -28,6 +29,84 @@ class Settings(BaseSettings):
     debug: bool = False
     cors_origins: List[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
     
+    # Chat Log Writer Configuration
+    log_queue_size: int = 1000
+    log_batch_size: int = 50
+    log_flush_interval: float = 1.0
+    
+    # Session Store Configuration
+    session_backend: str = "memory"
+    session_max_sessions: int = 1000
+    session_ttl_seconds: int = 86400
+    session_max_bytes: int = 256 * 1024 * 1024
+    session_sqlite_path: str = "sessions.db"
+    
+    # Conversation History Configuration
+    history_keep_turns: int = 4
+    history_max_input_tokens: int = 12000
+    
+    # Attachment Processing Configuration
+    max_request_bytes: int = 100 * 1024 * 1024
+    attachment_executor: str = "process"
+    attachment_workers: Optional[int] = None
+    attachment_concurrency: int = 4
+    attachment_max_bytes: int = 20 * 1024 * 1024
+    attachment_max_pdf_pages: int = 100
+    attachment_timeout: float = 30.0
+    
+    # Image Preprocessing Configuration
+    image_max_side: int = 2048
+    image_format: str = "webp"
+    image_quality: int = 85
+    
+    # Attachment Cache Configuration
+    attachment_cache_enabled: bool = True
+    attachment_cache_max_bytes: int = 64 * 1024 * 1024
+    attachment_cache_dir: Optional[str] = None
+    attachment_cache_disk_max_bytes: int = 1024 * 1024 * 1024
+    
+    # Answer Cache Configuration
+    answer_cache_enabled: bool = True
+    answer_cache_ttl_seconds: int = 3600
+    answer_cache_max_entries: int = 1000
+    answer_cache_semantic: bool = False
+    answer_cache_similarity: float = 0.95
+    answer_cache_embedding_model: str = "text-embedding-3-small"
+    answer_cache_refresh_interval: int = 300
+    
+    # File Search Configuration
+    file_search_max_results: int = 5
+    file_search_score_threshold: float = 0.0
+    file_search_include_results: bool = False
+    file_search_cache_enabled: bool = False
+    file_search_cache_ttl_seconds: int = 120
+    file_search_cache_max_entries: int = 512
+    
+    # Model Routing Configuration
+    agent_model: str = "gpt-4o"
+    routing_enabled: bool = True
+    routing_fast_model: str = "gpt-4o-mini"
+    routing_max_simple_chars: int = 160
+    
+    # Startup Verification Configuration
+    startup_probe_timeout: float = 10.0
+    
+    # Health Probe Configuration
+    health_probe_interval: float = 15.0
+    health_probe_timeout: float = 5.0
+    
+    # Admission Control Configuration
+    admission_max_in_flight: int = 32
+    admission_max_queue: int = 64
+    admission_queue_timeout: float = 30.0
+    rate_limit_enabled: bool = False
+    rate_limit_per_minute: float = 20.0
+    rate_limit_burst: int = 10
+    rate_limit_trust_forwarded: bool = False
+    coalescing_enabled: bool = True
+    metrics_enabled: bool = True
+    request_log_enabled: bool = True
+    
     @field_validator('openai_api_key')
     @classmethod
     def validate_openai_key(cls, v: str) -> str:
@@ -42,6 +121,41 @@ class Settings(BaseSettings):
             raise ValueError('Invalid vector store ID format')
         return v
     
+    @field_validator('session_backend')
+    @classmethod
+    def validate_session_backend(cls, v: str) -> str:
+        if v not in ('memory', 'sqlite'):
+            raise ValueError('Session backend must be "memory" or "sqlite"')
+        return v
+    
+    @field_validator('attachment_executor')
+    @classmethod
+    def validate_attachment_executor(cls, v: str) -> str:
+        if v not in ('process', 'thread'):
+            raise ValueError('Attachment executor must be "process" or "thread"')
+        return v
+    
+    @field_validator('image_format')
+    @classmethod
+    def validate_image_format(cls, v: str) -> str:
+        if v not in ('webp', 'jpeg', 'png'):
+            raise ValueError('Image format must be "webp", "jpeg" or "png"')
+        return v
+    
+    @field_validator('file_search_max_results')
+    @classmethod
+    def validate_file_search_max_results(cls, v: int) -> int:
+        if not 1 <= v <= 50:
+            raise ValueError('File search max results must be between 1 and 50')
+        return v
+    
+    @field_validator('file_search_score_threshold')
+    @classmethod
+    def validate_file_search_score_threshold(cls, v: float) -> float:
+        if not 0.0 <= v <= 1.0:
+            raise ValueError('File search score threshold must be between 0 and 1')
+        return v
+    
     @field_validator('supabase_url')
     @classmethod
     def validate_supabase_url(cls, v: str) -> str:
@@ -50,6 +164,7 @@ class Settings(BaseSettings):
         return v
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings."""
+    """Get application settings, loaded and validated once per process."""
     return Settings()
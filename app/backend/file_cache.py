@@ -0,0 +1,134 @@
+"""
+Content-addressed cache for processed attachments.
+Stores extracted PDF text and prepared image payloads keyed by the SHA-256 of the upload.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class AttachmentCache:
+    """Two-tier LRU cache: memory first, then an optional size-capped directory."""
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self._max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._memory_sizes: Dict[str, int] = {}
+        self._memory_bytes = 0
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._max_disk_bytes = max_disk_bytes
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self._disk_dir.glob("*/*.json"))
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached value, promoting disk hits into memory."""
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return value
+
+        if self._disk_dir is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+            if value is not None:
+                self.disk_hits += 1
+                self._memory_put(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a JSON-serializable value in every enabled tier."""
+        self._memory_put(key, value)
+        if self._disk_dir is not None:
+            await asyncio.to_thread(self._disk_put, key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters and tier sizes."""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def _memory_put(self, key: str, value: Dict[str, Any]) -> None:
+        size = len(json.dumps(value, ensure_ascii=False))
+        if size > self._max_memory_bytes:
+            return
+        self._memory_bytes -= self._memory_sizes.pop(key, 0)
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        self._memory_sizes[key] = size
+        self._memory_bytes += size
+        while self._memory_bytes > self._max_memory_bytes:
+            oldest, _ = self._memory.popitem(last=False)
+            self._memory_bytes -= self._memory_sizes.pop(oldest)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self._disk_dir / name[:2] / f"{name}.json"
+
+    def _disk_get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # Refresh mtime so disk eviction stays least-recently-used
+            return value
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, value: Dict[str, Any]) -> None:
+        path = self._disk_path(key)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(data) > self._max_disk_bytes:
+            return
+        with self._disk_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            previous = path.stat().st_size if path.exists() else 0
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            self._disk_bytes += len(data) - previous
+            if self._disk_bytes > self._max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = sorted(
+            ((p.stat().st_mtime, p.stat().st_size, p) for p in self._disk_dir.glob("*/*.json")),
+            key=lambda entry: entry[0],
+        )
+        for _, size, path in entries:
+            if self._disk_bytes <= self._max_disk_bytes:
+                break
+            try:
+                path.unlink()
+                self._disk_bytes -= size
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,107 @@
+"""
+File search tool for the ISST agent.
+Builds the hosted FileSearchTool from Settings or, when result caching is enabled,
+a function tool that queries the vector store directly and caches results by query.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import FileSearchTool, function_tool
+
+from answer_cache import normalize_question
+from metrics import timed_stage
+
+
+class SearchResultCache:
+    """Short-lived TTL/LRU cache of formatted search results keyed by normalized query."""
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 512):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str) -> Optional[str]:
+        key = normalize_question(query)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, query: str, results: str) -> None:
+        key = normalize_question(query)
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every cached result."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters."""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def ranking_options(score_threshold: float) -> Optional[Dict[str, Any]]:
+    """Ranking options for the search API, or None to keep the service defaults."""
+    return {"ranker": "auto", "score_threshold": score_threshold} if score_threshold > 0 else None
+
+
+def format_results(results: List[Any]) -> str:
+    """Format vector store search results as context for the model."""
+    if not results:
+        return "No relevant course material found."
+    sections = []
+    for result in results:
+        text = "\n".join(part.text for part in result.content if getattr(part, "text", None))
+        sections.append(f"[{result.filename}] (score {result.score:.2f})\n{text}")
+    return "\n\n".join(sections)
+
+
+def create_search_tool(settings, openai_client, cache: Optional[SearchResultCache] = None):
+    """Create the agent's file search tool from Settings.
+
+    Without a cache the hosted FileSearchTool is used. With a cache the search runs
+    through the vector store search API so repeated queries skip the round trip.
+    """
+    options = ranking_options(settings.file_search_score_threshold)
+    if cache is None:
+        return FileSearchTool(
+            vector_store_ids=[settings.vector_store_id],
+            max_num_results=settings.file_search_max_results,
+            include_search_results=settings.file_search_include_results,
+            ranking_options=options
+        )
+
+    search_params: Dict[str, Any] = {"max_num_results": settings.file_search_max_results}
+    if options:
+        search_params["ranking_options"] = options
+
+    @function_tool(name_override="file_search")
+    async def file_search(query: str) -> str:
+        """Search the ISST course materials for passages relevant to the query.
+
+        Args:
+            query: What to look for in the course materials.
+        """
+        with timed_stage("tool_file_search"):
+            cached = cache.get(query)
+            if cached is not None:
+                return cached
+            page = await openai_client.vector_stores.search(
+                vector_store_id=settings.vector_store_id, query=query, **search_params
+            )
+            results = format_results(page.data)
+            cache.put(query, results)
+            return results
+
+    return file_search
@@ -0,0 +1,127 @@
+"""
+Conversation history compaction for the ISST AI Tutor backend.
+Keeps the prompt sent to the agent bounded on long sessions.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List
+
+
+PDF_CONTENT_PATTERN = re.compile(
+    r"Contenido del PDF adjunto \('(?P<name>.*?)'\):\n---BEGIN PDF CONTENT---\n(?P<text>.*?)\n---END PDF CONTENT---",
+    re.DOTALL,
+)
+
+# Rough cost of an image input; the exact figure depends on resolution and detail
+IMAGE_TOKEN_ESTIMATE = 1000
+
+
+@dataclass
+class HistoryPolicy:
+    """How much of a session's history is sent to the model on each turn."""
+
+    keep_last_turns: int = 4
+    max_input_tokens: int = 12000
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """Load the tokenizer on first use; loading it can take a while, so it is kept off import."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # tiktoken is optional; fall back to a character heuristic
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text with the local tokenizer."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """Estimate the prompt tokens used by a history message."""
+    content = message.get("content")
+    if isinstance(content, str):
+        return count_tokens(content) + 4
+    tokens = 4
+    for part in content or []:
+        if part.get("type") == "input_image":
+            tokens += IMAGE_TOKEN_ESTIMATE
+        elif "text" in part:
+            tokens += count_tokens(part["text"])
+        else:
+            tokens += count_tokens(json.dumps(part))
+    return tokens
+
+
+def estimate_history_tokens(history: List[Dict[str, Any]]) -> int:
+    """Estimate the prompt tokens used by a whole history."""
+    return sum(estimate_message_tokens(message) for message in history)
+
+
+def split_turns(history: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Group a history into turns, each starting with a user message."""
+    turns: List[List[Dict[str, Any]]] = []
+    for message in history:
+        if message.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _replace_pdf_content(match: "re.Match") -> str:
+    return f"[PDF adjunto '{match.group('name')}' omitido ({len(match.group('text'))} caracteres)]"
+
+
+def strip_attachments(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a message with attachment content replaced by placeholders."""
+    content = message.get("content")
+    if isinstance(content, str):
+        return message
+
+    parts = []
+    for part in content or []:
+        if part.get("type") == "input_image":
+            parts.append({"type": "input_text", "text": "[Imagen adjunta omitida]"})
+        elif part.get("type") == "input_text" and "---BEGIN PDF CONTENT---" in part.get("text", ""):
+            parts.append({"type": "input_text", "text": PDF_CONTENT_PATTERN.sub(_replace_pdf_content, part["text"])})
+        else:
+            parts.append(part)
+    return {**message, "content": parts}
+
+
+def compact_history(history: List[Dict[str, Any]], policy: HistoryPolicy) -> List[Dict[str, Any]]:
+    """Build the model input for a turn from the full session history.
+
+    The last `keep_last_turns` turns are always sent verbatim and older turns
+    have their attachments replaced by placeholders. If the estimate exceeds
+    `max_input_tokens`, the oldest turns are dropped, but only when that brings
+    the input under budget; the recent turns alone may still exceed it.
+    """
+    turns = split_turns(history)
+    recent_start = max(0, len(turns) - max(1, policy.keep_last_turns))
+
+    older = [[strip_attachments(message) for message in turn] for turn in turns[:recent_start]]
+    recent = turns[recent_start:]
+
+    # Dropping older turns cannot help once the recent turns alone are over budget
+    budget = policy.max_input_tokens - estimate_history_tokens([m for turn in recent for m in turn])
+    if budget >= 0:
+        turn_tokens = [estimate_history_tokens(turn) for turn in older]
+        total = sum(turn_tokens)
+        first = 0
+        while total > budget:
+            total -= turn_tokens[first]
+            first += 1
+        older = older[first:]
+
+    return [message for turn in older + recent for message in turn]
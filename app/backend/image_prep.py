@@ -0,0 +1,55 @@
+"""
+Image preprocessing for the ISST AI Tutor backend.
+Downscales and recompresses uploaded images before they are sent to the model.
+"""
+
+import io
+from typing import Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; images are then sent unchanged
+    Image = None
+
+
+FORMAT_MIME_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+def prepare_image(data: bytes, mime_type: str, max_side: int = 2048, output_format: str = "webp", quality: int = 85) -> Tuple[bytes, str]:
+    """Cap the longest side, drop metadata and re-encode an image.
+
+    Returns the prepared bytes and their MIME type. The original bytes are
+    returned when Pillow is unavailable, cannot process the image, or the image
+    is animated.
+    """
+    if Image is None:
+        return data, mime_type
+
+    try:
+        return _reencode(data, mime_type, max_side, output_format, quality)
+    except Exception as e:
+        # Let the model try the upload as sent, as before images were prepared
+        print(f"Warning: could not prepare image ({mime_type}), sending it unchanged: {e}")
+        return data, mime_type
+
+
+def _reencode(data: bytes, mime_type: str, max_side: int, output_format: str, quality: int) -> Tuple[bytes, str]:
+    with Image.open(io.BytesIO(data)) as image:
+        if getattr(image, "is_animated", False):
+            return data, mime_type
+
+        # Apply the EXIF orientation before the metadata is dropped
+        image = ImageOps.exif_transpose(image)
+        if max(image.size) > max_side:
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        if output_format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        buffer = io.BytesIO()
+        save_options = {"optimize": True} if output_format == "png" else {"quality": quality}
+        image.save(buffer, format=output_format.upper(), **save_options)
+
+    return buffer.getvalue(), FORMAT_MIME_TYPES[output_format]
@@ -0,0 +1,196 @@
+"""
+Metrics and structured logging for the ISST AI Tutor backend.
+A small in-process registry rendered in the Prometheus text format, the chat
+pipeline metrics, and JSON log lines tagged with the current request ID.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Request ID of the request being handled, for log correlation
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+# Stage timings of the chat turn being handled, filled in by observe_stage
+turn_timings_var: ContextVar[Optional[Dict[str, float]]] = ContextVar("turn_timings", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Current value per label set."""
+
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # One count per bucket, then +Inf, sum
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {count}")
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Collects metrics and renders them for a Prometheus scrape."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "chat_stage_seconds", "Time spent in each stage of the chat pipeline.", ("stage",)
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request duration.", ("method", "path", "status")
+))
+CHAT_TURNS = registry.register(Counter(
+    "chat_turns_total", "Chat turns by endpoint, model and outcome.", ("endpoint", "model", "outcome")
+))
+CHAT_TOKENS = registry.register(Counter(
+    "chat_tokens_total", "Model tokens used by chat turns.", ("model", "direction")
+))
+REQUEST_TOKENS = registry.register(Histogram(
+    "chat_request_tokens", "Model tokens per chat turn.", ("direction",),
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+))
+SESSIONS = registry.register(Gauge("chat_sessions", "Sessions held in the session store."))
+IN_FLIGHT = registry.register(Gauge("chat_requests_in_flight", "Chat turns running an agent."))
+QUEUED = registry.register(Gauge("chat_requests_waiting", "Chat turns waiting for admission."))
+LOG_BACKLOG = registry.register(Gauge("chat_log_pending", "Chat log rows waiting to be written."))
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration in the histogram and in the current turn's timings."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = turn_timings_var.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Time the enclosed block as a pipeline stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def record_usage(model: str, usage) -> Dict[str, int]:
+    """Count the input and output tokens of an agent run."""
+    tokens = {"input": getattr(usage, "input_tokens", 0) or 0, "output": getattr(usage, "output_tokens", 0) or 0}
+    for direction, count in tokens.items():
+        CHAT_TOKENS.inc(count, model=model, direction=direction)
+        REQUEST_TOKENS.observe(count, direction=direction)
+    return tokens
+
+
+def log_event(event: str, **fields) -> None:
+    """Print a structured JSON log line tagged with the current request ID."""
+    record = {"ts": round(time.time(), 3), "event": event, "request_id": request_id_var.get()}
+    record.update(fields)
+    print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
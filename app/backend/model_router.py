@@ -0,0 +1,105 @@
+"""
+Per-request model routing.
+Sends trivial and logistics turns to a fast model and keeps the default model
+for attachments and questions that need reasoning.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from answer_cache import normalize_question
+
+
+# Greetings, thanks and acknowledgements that need no course knowledge
+SMALL_TALK_PATTERN = (
+    r"^(hola|buenas( tardes| noches| dias)?|buenos dias|hey|hi|hello|gracias( .*)?|muchas gracias.*|"
+    r"vale|ok|okay|perfecto|genial|entendido|adios|hasta luego|chao|thanks.*|thank you.*)$"
+)
+
+# Course logistics answered by a lookup in the materials
+LOGISTICS_KEYWORDS = [
+    "fecha", "examen", "horario", "entrega", "plazo", "aula", "tutoria", "convocatoria",
+    "nota", "calificacion", "profesor", "correo", "moodle", "cuando es", "donde es",
+]
+
+# Wording that signals explanation, comparison, design or code
+COMPLEX_KEYWORDS = [
+    "por que", "explica", "compara", "diferencia", "ventaja", "desventaja", "disena", "diseno",
+    "implementa", "codigo", "ejemplo", "analiza", "justifica", "demuestra", "como funciona",
+    "resuelve", "ejercicio", "arquitectura", "optimiza", "error", "why", "explain", "compare",
+]
+
+
+@dataclass
+class Route:
+    """The model chosen for a request and why."""
+
+    name: str
+    model: str
+    reason: str
+
+
+class ModelRouter:
+    """Rule-based router with a lightweight length and structure classifier."""
+
+    def __init__(
+        self,
+        default_model: str,
+        fast_model: str,
+        max_simple_chars: int = 160,
+        logistics_keywords: List[str] = LOGISTICS_KEYWORDS,
+        complex_keywords: List[str] = COMPLEX_KEYWORDS,
+    ):
+        self.default_model = default_model
+        self.fast_model = fast_model
+        self.max_simple_chars = max_simple_chars
+        self._small_talk = re.compile(SMALL_TALK_PATTERN)
+        self._logistics = [normalize_question(k) for k in logistics_keywords]
+        self._complex = [normalize_question(k) for k in complex_keywords]
+        self.counts: Counter = Counter()
+
+    def _default(self, reason: str) -> Route:
+        return Route("default", self.default_model, reason)
+
+    def _fast(self, reason: str) -> Route:
+        return Route("fast", self.fast_model, reason)
+
+    def classify(self, question: str, has_attachments: bool, history: List[Dict[str, Any]]) -> Route:
+        """Pick a route for a turn without recording it."""
+        if has_attachments:
+            return self._default("attachments")
+
+        text = normalize_question(question)
+        if not text:
+            return self._default("empty")
+        if self._small_talk.match(text):
+            return self._fast("small_talk")
+
+        padded = f" {text} "
+        if any(f" {k} " in padded for k in self._complex) or "```" in question:
+            return self._default("complex")
+        # Short follow-ups lean on the previous answer, so keep the model that produced it
+        if history:
+            return self._default("follow_up")
+        if len(question) > self.max_simple_chars or question.count("?") > 1 or "\n" in question.strip():
+            return self._default("long")
+        if any(f" {k} " in padded for k in self._logistics):
+            return self._fast("logistics")
+        # Short conceptual questions still need course knowledge and reasoning
+        return self._default("general")
+
+    def route(self, question: str, has_attachments: bool, history: List[Dict[str, Any]]) -> Route:
+        """Pick a route for a turn and count it."""
+        route = self.classify(question, has_attachments, history)
+        self.counts[f"{route.name}:{route.reason}"] += 1
+        return route
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the models and how many requests each route served."""
+        return {
+            "default_model": self.default_model,
+            "fast_model": self.fast_model,
+            "routes": dict(self.counts),
+        }
@@ -0,0 +1,174 @@
+"""
+Dependency probes for the ISST AI Tutor backend.
+Checks OpenAI, the vector store and Supabase concurrently, each under its own timeout,
+either once (start.py --verify) or periodically in the background (readiness).
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of one dependency probe."""
+
+    name: str
+    ok: bool
+    elapsed: float
+    detail: str = ""
+    checked_at: float = 0.0
+
+
+def probe_openai(client, settings) -> str:
+    """List models to confirm the API key works."""
+    client.models.list()
+    return "OpenAI API connection successful"
+
+
+def probe_vector_store(client, settings) -> str:
+    """Retrieve the configured vector store."""
+    vector_store = client.vector_stores.retrieve(settings.vector_store_id)
+    return f"Vector Store accessible: {vector_store.name} ({vector_store.status})"
+
+
+def probe_supabase(client, settings) -> str:
+    """Read one row from the chat log table."""
+    from supabase import create_client
+
+    supabase = create_client(settings.supabase_url, settings.supabase_service_role_key)
+    supabase.table("chat_logs").select("id").limit(1).execute()
+    return "Supabase connection successful"
+
+
+PROBES: Dict[str, Callable] = {
+    "OpenAI": probe_openai,
+    "Vector Store": probe_vector_store,
+    "Supabase": probe_supabase,
+}
+
+
+def run_probes(settings, timeout: float = 10.0, names: Optional[List[str]] = None) -> List[ProbeResult]:
+    """Run the probes concurrently. A probe that exceeds `timeout` seconds fails.
+
+    The OpenAI probes share one client with the same timeout and no retries, so a
+    slow dependency is reported instead of retried.
+    """
+    import openai
+    # Import before the threads start so concurrent probes never see a half-imported module
+    import supabase  # noqa: F401
+
+    client = openai.OpenAI(api_key=settings.openai_api_key, timeout=timeout, max_retries=0)
+    selected = [(name, PROBES[name]) for name in (names or PROBES)]
+    executor = ThreadPoolExecutor(max_workers=len(selected), thread_name_prefix="probe")
+
+    def timed(probe):
+        start = time.perf_counter()
+        try:
+            return True, probe(client, settings), time.perf_counter() - start
+        except Exception as e:
+            return False, str(e), time.perf_counter() - start
+
+    started = time.perf_counter()
+    futures = [(name, executor.submit(timed, probe)) for name, probe in selected]
+    results = []
+    for name, future in futures:
+        remaining = max(0.0, timeout - (time.perf_counter() - started))
+        try:
+            ok, detail, elapsed = future.result(timeout=remaining)
+            results.append(ProbeResult(name, ok, elapsed, detail))
+        except FutureTimeout:
+            results.append(ProbeResult(name, False, timeout, f"timed out after {timeout:g}s"))
+    # Do not wait for probes stuck past their timeout
+    executor.shutdown(wait=False)
+    return results
+
+
+class HealthMonitor:
+    """Runs async probes on an interval and caches the latest results.
+
+    Health endpoints read the cache, so polling them never makes outbound calls.
+    Only the `required` probes (all of them by default) gate readiness; the
+    others are reported as degraded.
+    """
+
+    def __init__(self, probes: Dict[str, Callable[[], Awaitable[str]]], interval: float = 15.0, timeout: float = 5.0,
+                 required: Optional[Set[str]] = None):
+        self._probes = probes
+        self.required = set(probes) if required is None else set(required)
+        self.interval = interval
+        self.timeout = timeout
+        # Results older than this no longer prove the instance is healthy
+        self.stale_after = interval * 3 + timeout
+        self.results: Dict[str, ProbeResult] = {}
+        self.draining = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe(self, name: str, probe: Callable[[], Awaitable[str]]) -> ProbeResult:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(probe(), timeout=self.timeout)
+            ok = True
+        except asyncio.TimeoutError:
+            ok, detail = False, f"timed out after {self.timeout:g}s"
+        except Exception as e:
+            ok, detail = False, str(e)
+        return ProbeResult(name, ok, time.perf_counter() - start, detail, time.time())
+
+    async def run_once(self) -> List[ProbeResult]:
+        """Run every probe concurrently and cache the results."""
+        results = await asyncio.gather(*(self._probe(name, probe) for name, probe in self._probes.items()))
+        for result in results:
+            if not result.ok and self.results.get(result.name, result).ok:
+                print(f"Health probe {result.name} failed: {result.detail}")
+            self.results[result.name] = result
+        return results
+
+    async def _run(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start probing in the background."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop probing and report not ready from now on."""
+        self.draining = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _passing(self, names) -> bool:
+        now = time.time()
+        return all(
+            name in self.results and self.results[name].ok and now - self.results[name].checked_at <= self.stale_after
+            for name in names
+        )
+
+    def ready(self) -> bool:
+        """Whether every required probe passed recently and the instance is not shutting down."""
+        return not self.draining and self._passing(self.required)
+
+    def healthy(self) -> bool:
+        """Whether every probe, required or not, passed recently."""
+        return self.ready() and self._passing(self._probes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the cached probe results with latencies."""
+        return {
+            name: {
+                "ok": r.ok,
+                "required": name in self.required,
+                "latency_ms": round(r.elapsed * 1000, 1),
+                "detail": r.detail,
+                "age_seconds": round(time.time() - r.checked_at, 1),
+            }
+            for name, r in self.results.items()
+        }
@@ -0,0 +1,216 @@
+"""
+Conversation history storage for the ISST AI Tutor backend.
+Provides a bounded in-memory store and a SQLite store shared between workers.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+
+class SessionStore(ABC):
+    """Interface for conversation history backends."""
+
+    @abstractmethod
+    async def get(self, session_id: str) -> List[Dict[str, Any]]:
+        """Return a copy of the history for a session (empty if unknown)."""
+
+    @abstractmethod
+    async def append(self, session_id: str, *messages: Dict[str, Any]) -> None:
+        """Append messages to a session's history."""
+
+    @abstractmethod
+    async def size(self) -> int:
+        """Return the number of live sessions."""
+
+    async def close(self) -> None:
+        """Release backend resources."""
+
+
+def estimate_message_size(message: Dict[str, Any]) -> int:
+    """Approximate the memory footprint of a history message in bytes."""
+    return len(json.dumps(message, ensure_ascii=False))
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local LRU store with TTL expiry and a memory budget."""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 86400, max_bytes: int = 256 * 1024 * 1024):
+        self._max_sessions = max(1, max_sessions)
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._touched: Dict[str, float] = {}
+        self._total_bytes = 0
+        self.evictions = 0
+
+    async def get(self, session_id: str) -> List[Dict[str, Any]]:
+        self._expire()
+        if session_id not in self._sessions:
+            return []
+        self._sessions.move_to_end(session_id)
+        self._touched[session_id] = time.monotonic()
+        return list(self._sessions[session_id])
+
+    async def append(self, session_id: str, *messages: Dict[str, Any]) -> None:
+        # Expire first so an expired session starts over instead of being revived
+        self._expire()
+        history = self._sessions.setdefault(session_id, [])
+        history.extend(messages)
+        added = sum(estimate_message_size(m) for m in messages)
+        self._sizes[session_id] = self._sizes.get(session_id, 0) + added
+        self._total_bytes += added
+        self._sessions.move_to_end(session_id)
+        self._touched[session_id] = time.monotonic()
+        self._expire()
+        self._enforce_limits()
+
+    async def size(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _remove(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+        self._touched.pop(session_id, None)
+
+    def _expire(self) -> None:
+        if not self._ttl_seconds:
+            return
+        cutoff = time.monotonic() - self._ttl_seconds
+        # Sessions are kept in access order, so expired ones sit at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions))
+            if self._touched.get(oldest, 0) >= cutoff:
+                break
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _enforce_limits(self) -> None:
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self._max_sessions or self._total_bytes > self._max_bytes
+        ):
+            self._remove(next(iter(self._sessions)))
+            self.evictions += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed store that several uvicorn workers can share."""
+
+    def __init__(self, path: str = "sessions.db", ttl_seconds: float = 86400, purge_interval: float = 60.0):
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        self._purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, message TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_session_messages_session ON session_messages (session_id, id)"
+        )
+
+    async def get(self, session_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._locked, self._get, session_id)
+
+    async def append(self, session_id: str, *messages: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._locked, self._append, session_id, messages)
+
+    async def size(self) -> int:
+        return await asyncio.to_thread(self._locked, self._size)
+
+    async def close(self) -> None:
+        self._conn.close()
+
+    def _locked(self, func, *args):
+        # The connection is shared across worker threads, so serialize access to it
+        with self._lock:
+            return func(*args)
+
+    def _cutoff(self) -> float:
+        return time.time() - self._ttl_seconds if self._ttl_seconds else 0.0
+
+    def _get(self, session_id: str) -> List[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT updated_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or row[0] < self._cutoff():
+            return []
+        rows = self._conn.execute(
+            "SELECT message FROM session_messages WHERE session_id = ? ORDER BY id", (session_id,)
+        ).fetchall()
+        return [json.loads(message) for (message,) in rows]
+
+    def _append(self, session_id: str, messages: tuple) -> None:
+        now = time.time()
+        cutoff = self._cutoff()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # An expired session starts over instead of being revived by the upsert below
+            self._conn.execute(
+                "DELETE FROM session_messages WHERE session_id IN "
+                "(SELECT session_id FROM sessions WHERE session_id = ? AND updated_at < ?)",
+                (session_id, cutoff),
+            )
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (session_id, now),
+            )
+            self._conn.executemany(
+                "INSERT INTO session_messages (session_id, message) VALUES (?, ?)",
+                [(session_id, json.dumps(m, ensure_ascii=False)) for m in messages],
+            )
+            if now - self._last_purge >= self._purge_interval:
+                self._purge(cutoff)
+                self._last_purge = now
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _purge(self, cutoff: float) -> None:
+        if not cutoff:
+            return
+        self._conn.execute(
+            "DELETE FROM session_messages WHERE session_id IN "
+            "(SELECT session_id FROM sessions WHERE updated_at < ?)",
+            (cutoff,),
+        )
+        self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+
+    def _size(self) -> int:
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM sessions WHERE updated_at >= ?", (self._cutoff(),)
+        ).fetchone()
+        return count
+
+
+def create_session_store(settings: Any) -> SessionStore:
+    """Build the session store selected in the application settings."""
+    if settings.session_backend == "sqlite":
+        return SQLiteSessionStore(settings.session_sqlite_path, ttl_seconds=settings.session_ttl_seconds)
+    if settings.session_backend == "memory":
+        return MemorySessionStore(
+            max_sessions=settings.session_max_sessions,
+            ttl_seconds=settings.session_ttl_seconds,
+            max_bytes=settings.session_max_bytes,
+        )
+    raise ValueError(f"Unknown session backend: {settings.session_backend}")
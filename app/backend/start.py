@@ -1,10 +1,13 @@
 """
 Unified startup script for the ISST AI Tutor backend.
 Includes configuration verification and server startup.
+Settings are loaded once, dependency probes run concurrently and the
+application is imported in the background while checks run.
 """
 
 import sys
 import os
+import threading
 from pathlib import Path
 
 
@@ -39,16 +42,6 @@ def check_openai_config(verbose: bool = False) -> bool:
         if verbose:
             api_key = settings.openai_api_key
             print(f"✅ OPENAI_API_KEY: {api_key[:10]}...{api_key[-4:]}")
-            
-            # Test OpenAI connection only in verbose mode
-            try:
-                import openai
-                client = openai.OpenAI(api_key=api_key)
-                models = client.models.list()
-                print("✅ OpenAI API connection successful")
-            except Exception as e:
-                print(f"❌ OpenAI API connection failed: {e}")
-                return False
         
         return True
     except Exception as e:
@@ -65,16 +58,6 @@ def check_vector_store(verbose: bool = False) -> bool:
         
         if verbose:
             print(f"✅ VECTOR_STORE_ID: {settings.vector_store_id}")
-            
-            # Test vector store access only in verbose mode
-            try:
-                import openai
-                client = openai.OpenAI(api_key=settings.openai_api_key)
-                vector_store = client.vector_stores.retrieve(settings.vector_store_id)
-                print(f"✅ Vector Store accessible: {vector_store.name}")
-            except Exception as e:
-                print(f"❌ Vector Store access failed: {e}")
-                return False
         
         return True
     except Exception as e:
@@ -92,16 +75,6 @@ def check_supabase_config(verbose: bool = False) -> bool:
         if verbose:
             print(f"✅ SUPABASE_URL: {settings.supabase_url}")
             print(f"✅ SUPABASE_SERVICE_ROLE_KEY: {settings.supabase_service_role_key[:20]}...")
-            
-            # Test Supabase connection only in verbose mode
-            try:
-                from supabase import create_client
-                supabase = create_client(settings.supabase_url, settings.supabase_service_role_key)
-                result = supabase.table("chat_logs").select("*").limit(1).execute()
-                print("✅ Supabase connection successful")
-            except Exception as e:
-                print(f"❌ Supabase connection failed: {e}")
-                return False
         
         return True
     except Exception as e:
@@ -136,6 +109,30 @@ def check_system_prompt(verbose: bool = False) -> bool:
         return False
 
 
+def verify_connections() -> list:
+    """Probe OpenAI, the Vector Store and Supabase concurrently and print their timings."""
+    try:
+        from config import get_settings
+        from probes import run_probes
+        settings = get_settings()
+    except Exception as e:
+        print(f"\n❌ Skipping connection checks: {e}")
+        return [("Connections", False)]
+    
+    timeout = settings.startup_probe_timeout
+    print(f"\n🔍 Checking connections (concurrently, {timeout:.0f}s timeout each)...")
+    probe_results = run_probes(settings, timeout=timeout)
+    slowest = max(probe_results, key=lambda r: r.elapsed)
+    
+    results = []
+    for result in probe_results:
+        status = "✅" if result.ok else "❌"
+        marker = "  ⏱️ slowest" if result is slowest and len(probe_results) > 1 else ""
+        print(f"{status} {result.name}: {result.detail} ({result.elapsed * 1000:.0f} ms){marker}")
+        results.append((f"{result.name} Connection ({result.elapsed * 1000:.0f} ms)", result.ok))
+    return results
+
+
 def run_full_verification() -> bool:
     """Run complete configuration verification with detailed output."""
     print("🔧 ISST AI Tutor - Configuration Verification")
@@ -159,6 +156,8 @@ def run_full_verification() -> bool:
             print(f"❌ {name} check failed with error: {e}")
             results.append((name, False))
     
+    results.extend(verify_connections())
+    
     print("\n" + "=" * 50)
     print("📊 VERIFICATION SUMMARY")
     print("=" * 50)
@@ -184,22 +183,20 @@ def check_startup_requirements() -> bool:
     print("🔍 Checking startup requirements...")
     
     essential_checks = [
-        check_env_file,
-        check_system_prompt,
-        check_openai_config,
-        check_vector_store,
-        check_supabase_config
+        ("Environment File", check_env_file),
+        ("System Prompt", check_system_prompt),
+        ("OpenAI Config", check_openai_config),
+        ("Vector Store", check_vector_store),
+        ("Supabase Config", check_supabase_config),
     ]
     
     failed_checks = []
-    for i, check_func in enumerate(essential_checks):
+    for name, check_func in essential_checks:
         try:
             if not check_func(verbose=False):
-                check_names = ["Environment File", "System Prompt", "OpenAI Config", "Vector Store", "Supabase Config"]
-                failed_checks.append(check_names[i])
+                failed_checks.append(name)
         except Exception:
-            check_names = ["Environment File", "System Prompt", "OpenAI Config", "Vector Store", "Supabase Config"]
-            failed_checks.append(check_names[i])
+            failed_checks.append(name)
     
     if failed_checks:
         print("❌ Startup requirements failed:")
@@ -212,6 +209,20 @@ def check_startup_requirements() -> bool:
     return True
 
 
+def preload_app() -> threading.Thread:
+    """Import the application in the background so its heavy imports overlap the checks."""
+    def load():
+        try:
+            import app  # noqa: F401
+        except BaseException:
+            # The import is retried in the foreground, which reports the error
+            pass
+    
+    thread = threading.Thread(target=load, name="preload-app", daemon=True)
+    thread.start()
+    return thread
+
+
 def main() -> None:
     """Main function - handles both verification and startup modes."""
     
@@ -229,6 +240,10 @@ def main() -> None:
     print("�🚀 Starting ISST AI Tutor Backend...")
     print("=" * 50)
     
+    # Start importing the application while the essential checks run
+    if check_env_file():
+        preload_app()
+    
     # Check startup requirements (fast, essential checks only)
     if not check_startup_requirements():
         print("\n💡 Run 'python start.py --verify' for detailed diagnostics")
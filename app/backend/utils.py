@@ -2,6 +2,7 @@
 Utility functions for the ISST AI Tutor backend.
 """
 
+import json
 import uuid
 from typing import Any, Dict, List
 from datetime import datetime, timezone
@@ -43,3 +44,8 @@ def validate_file_type(filename: str, allowed_types: List[str]) -> bool:
     
     extension = filename.lower().split('.')[-1]
     return extension in allowed_types
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
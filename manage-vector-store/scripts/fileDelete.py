@@ -1,23 +1,32 @@
 import argparse
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openaiClient import get_client
 
-def delete_file(file_id: str):
+def delete_file(file_id: str, client=None) -> bool:
     """Deletes a file from OpenAI."""
-    client = OpenAI()
+    client = client or get_client()
     try:
         client.files.delete(file_id)
         print(f"File {file_id} deleted successfully.")
+        return True
     except Exception as e:
         print(f"Error deleting file {file_id}: {e}")
+        return False
+
+def delete_files(file_ids: list, client=None, workers: int = 8) -> list:
+    """Deletes several files concurrently. Returns the IDs that failed."""
+    client = client or get_client()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(lambda file_id: delete_file(file_id, client), file_ids))
+    return [file_id for file_id, ok in zip(file_ids, results) if not ok]
 
 def main():
-    """Main function to parse arguments and delete a file."""
-    parser = argparse.ArgumentParser(description="Delete a file from OpenAI.")
-    parser.add_argument("file_id", help="The ID of the file to delete.")
+    """Main function to parse arguments and delete files."""
+    parser = argparse.ArgumentParser(description="Delete files from OpenAI.")
+    parser.add_argument("file_ids", nargs="+", help="The IDs of the files to delete.")
     args = parser.parse_args()
     
-    delete_file(args.file_id)
+    delete_files(args.file_ids)
 
 if __name__ == "__main__":
     main()
-
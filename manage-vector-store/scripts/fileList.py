@@ -1,17 +1,63 @@
-from openai import OpenAI
+"""
+Lists files uploaded to OpenAI.
+Pages are fetched lazily and printed as they arrive, with optional filters.
+"""
 
-def list_files():
-    """Lists all files from OpenAI."""
-    client = OpenAI()
+import argparse
+import sys
+from openaiClient import get_client
+from listing import add_filter_arguments, filter_items, format_size, format_time, print_rows
+
+FILE_COLUMNS = [
+    ("id", "ID", 29),
+    ("filename", "FILENAME", 40),
+    ("purpose", "PURPOSE", 12),
+    ("bytes", "SIZE", 10),
+    ("status", "STATUS", 10),
+    ("created_at", "CREATED", 16),
+]
+
+def iter_files(client=None, purpose: str = None, name_prefix: str = None, created_after: int = None, created_before: int = None, page_size: int = 100):
+    """Yields files newest first, fetching one page at a time."""
+    client = client or get_client()
+    params = {"limit": page_size, "order": "desc"}
+    if purpose:
+        params["purpose"] = purpose
+    return filter_items(client.files.list(**params), lambda f: f.filename, name_prefix, created_after, created_before)
+
+def file_rows(files):
+    """Yields (raw, formatted) rows for print_rows."""
+    for file in files:
+        raw = {
+            "id": file.id,
+            "filename": file.filename,
+            "purpose": file.purpose,
+            "bytes": file.bytes,
+            "status": getattr(file, "status", None),
+            "created_at": file.created_at,
+        }
+        formatted = dict(raw, bytes=format_size(file.bytes), status=raw["status"] or "-", created_at=format_time(file.created_at))
+        yield raw, formatted
+
+def list_files(client=None, purpose: str = None, name_prefix: str = None, created_after: int = None, created_before: int = None, output: str = "table"):
+    """Lists files from OpenAI. Returns the number listed, or None on error."""
     try:
-        files = list(client.files.list())
-        if files:
-            for file in files:
-                print(f"Filename: {file.filename}, ID: {file.id}")
-        else:
-            print("No files found.")
+        files = iter_files(client, purpose, name_prefix, created_after, created_before)
+        return print_rows(file_rows(files), FILE_COLUMNS, output)
     except Exception as e:
-        print(f"Error listing files: {e}")
+        print(f"Error listing files: {e}", file=sys.stderr)
+        return None
+
+def main():
+    """Main function to parse arguments and list files."""
+    parser = argparse.ArgumentParser(description="List files uploaded to OpenAI.")
+    parser.add_argument("--purpose", help="Only include files with this purpose (e.g. assistants).")
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
+    count = list_files(purpose=args.purpose, name_prefix=args.prefix, created_after=args.created_after,
+                       created_before=args.created_before, output=args.output)
+    sys.exit(1 if count is None else 0)
 
 if __name__ == "__main__":
-    list_files()
\ No newline at end of file
+    main()
@@ -1,13 +1,13 @@
 import argparse
-from openai import OpenAI
 import os
+from openaiClient import get_client
 
-def upload_file(file_path: str):
-    """Uploads a file to OpenAI."""
-    client = OpenAI()
+def upload_file(file_path: str, client=None):
+    """Uploads a file to OpenAI. Returns the file ID, or None on failure."""
+    client = client or get_client()
     if not os.path.exists(file_path):
         print(f"Error: File not found at {file_path}")
-        return
+        return None
 
     try:
         with open(file_path, "rb") as file:
@@ -16,8 +16,10 @@ def upload_file(file_path: str):
                 purpose="assistants"
             )
         print(f"File {file_path} uploaded successfully. File ID: {response.id}")
+        return response.id
     except Exception as e:
         print(f"Error uploading file: {e}")
+        return None
 
 def main():
     """Main function to parse arguments and upload a file."""
@@ -0,0 +1,176 @@
+"""
+Preprocesses course PDFs into clean text files before they are uploaded.
+Extracts text in parallel, strips headers and footers repeated across pages,
+normalizes whitespace and optionally splits large documents.
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# Lines near the top or bottom of a page that are checked for repeated boilerplate
+EDGE_LINES = 3
+
+def extract_pages(pdf_path: str) -> list:
+    """Extracts the text of every page of a PDF."""
+    import pypdf
+
+    with open(pdf_path, "rb") as file:
+        reader = pypdf.PdfReader(file)
+        return [page.extract_text() or "" for page in reader.pages]
+
+def boilerplate_key(line: str) -> str:
+    """Normalizes a line so page numbers and spacing do not hide repetition."""
+    return re.sub(r"\d+", "#", " ".join(line.split()).lower())
+
+def edge_lines(lines: list) -> list:
+    """Returns the indices of the lines near the top and bottom of a page."""
+    depth = min(EDGE_LINES, len(lines) // 3)
+    return sorted(set(range(depth)) | set(range(len(lines) - depth, len(lines))))
+
+def find_boilerplate(pages: list, min_ratio: float = 0.5) -> set:
+    """Finds header/footer lines that appear on at least `min_ratio` of the pages."""
+    if len(pages) < 3:
+        return set()
+    counts = Counter()
+    for text in pages:
+        lines = [line for line in text.splitlines() if line.strip()]
+        counts.update(set(boilerplate_key(lines[i]) for i in edge_lines(lines)))
+    return {key for key, count in counts.items() if count >= max(2, min_ratio * len(pages))}
+
+def normalize_whitespace(text: str) -> str:
+    """Joins hyphenated line breaks, collapses runs of spaces and blank lines."""
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t ]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+def clean_pages(pages: list, min_ratio: float = 0.5) -> tuple:
+    """Removes boilerplate lines and normalizes every page. Returns (pages, removed line count)."""
+    boilerplate = find_boilerplate(pages, min_ratio)
+    cleaned = []
+    removed = 0
+    for text in pages:
+        lines = [line for line in text.splitlines() if line.strip()]
+        # Only lines at the page edges are dropped, so body text that happens to repeat survives
+        drop = {i for i in edge_lines(lines) if boilerplate_key(lines[i]) in boilerplate}
+        removed += len(drop)
+        cleaned.append(normalize_whitespace("\n".join(line for i, line in enumerate(lines) if i not in drop)))
+    return cleaned, removed
+
+def split_pages(pages: list, max_chars: int) -> list:
+    """Groups consecutive pages into parts of at most `max_chars` characters (0 disables splitting)."""
+    parts, current, size = [], [], 0
+    for text in pages:
+        if max_chars and current and size + len(text) > max_chars:
+            parts.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text)
+    if current:
+        parts.append(current)
+    return parts
+
+def remove_previous_outputs(name: str, output_dir: str) -> int:
+    """Deletes the text files an earlier run wrote for a PDF. Returns how many were removed."""
+    pattern = re.compile(rf"{re.escape(name)}(\.part\d+)?\.txt")
+    removed = 0
+    for filename in os.listdir(output_dir):
+        if pattern.fullmatch(filename):
+            os.remove(os.path.join(output_dir, filename))
+            removed += 1
+    return removed
+
+def preprocess_file(pdf_path: str, output_dir: str, max_chars: int = 0, min_ratio: float = 0.5) -> dict:
+    """Converts one PDF into cleaned text files. Returns a report dict."""
+    name = os.path.splitext(os.path.basename(pdf_path))[0]
+    report = {"file": os.path.basename(pdf_path), "original_bytes": os.path.getsize(pdf_path)}
+    try:
+        raw_pages = extract_pages(pdf_path)
+        pages, removed = clean_pages(raw_pages, min_ratio)
+        non_empty = [text for text in pages if text]
+        parts = split_pages(non_empty, max_chars)
+
+        # Parts from a run with another --split-chars would otherwise be uploaded alongside these
+        remove_previous_outputs(name, output_dir)
+        outputs = []
+        for index, part in enumerate(parts, start=1):
+            suffix = f".part{index}" if len(parts) > 1 else ""
+            output_path = os.path.join(output_dir, f"{name}{suffix}.txt")
+            with open(output_path, "w", encoding="utf-8") as file:
+                file.write("\n\n".join(part))
+            outputs.append(output_path)
+
+        report.update({
+            "pages": len(raw_pages),
+            "empty_pages": len(raw_pages) - len(non_empty),
+            "boilerplate_lines": removed,
+            "raw_text_bytes": sum(len(text.encode("utf-8")) for text in raw_pages),
+            "cleaned_bytes": sum(os.path.getsize(path) for path in outputs),
+            "outputs": [os.path.basename(path) for path in outputs],
+        })
+    except Exception as e:
+        report["error"] = str(e)
+    return report
+
+def preprocess_directory(directory_path: str, output_dir: str, max_chars: int = 0, workers: int = None, min_ratio: float = 0.5) -> list:
+    """Preprocesses every PDF in a directory in parallel. Returns one report per PDF."""
+    if not os.path.isdir(directory_path):
+        print(f"Error: Directory not found at {directory_path}", file=sys.stderr)
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+
+    pdf_paths = [
+        os.path.join(directory_path, filename)
+        for filename in sorted(os.listdir(directory_path))
+        if filename.lower().endswith(".pdf") and os.path.isfile(os.path.join(directory_path, filename))
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        reports = list(executor.map(
+            preprocess_file, pdf_paths,
+            [output_dir] * len(pdf_paths), [max_chars] * len(pdf_paths), [min_ratio] * len(pdf_paths)
+        ))
+
+    print_report(reports)
+    return reports
+
+def print_report(reports: list):
+    """Prints per-file and total savings."""
+    ok = [r for r in reports if "error" not in r]
+    for r in reports:
+        if "error" in r:
+            print(f"Error processing {r['file']}: {r['error']}", file=sys.stderr)
+        else:
+            print(f"{r['file']}: {r['pages']} pages ({r['empty_pages']} empty), "
+                  f"{r['boilerplate_lines']} boilerplate lines removed, "
+                  f"{r['original_bytes']} -> {r['cleaned_bytes']} bytes in {len(r['outputs'])} file(s)")
+
+    original = sum(r["original_bytes"] for r in ok)
+    raw_text = sum(r["raw_text_bytes"] for r in ok)
+    cleaned = sum(r["cleaned_bytes"] for r in ok)
+    pages = sum(r["pages"] for r in ok)
+    empty = sum(r["empty_pages"] for r in ok)
+    print(f"Processed {len(ok)}/{len(reports)} PDFs: {pages} pages, {empty} empty pages dropped")
+    print(f"Bytes: {original} PDF -> {raw_text} raw text -> {cleaned} cleaned "
+          f"({original - cleaned} saved vs PDF, {raw_text - cleaned} saved vs raw text)")
+
+def main():
+    """Main function to parse arguments and preprocess PDFs."""
+    parser = argparse.ArgumentParser(description="Convert PDFs into cleaned text files for the vector store.")
+    parser.add_argument("directory_path", help="Directory containing the PDFs.")
+    parser.add_argument("output_dir", help="Directory where cleaned text files are written.")
+    parser.add_argument("--split-chars", type=int, default=0, help="Split documents into parts of at most this many characters.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--boilerplate-ratio", type=float, default=0.5, help="Fraction of pages a header/footer line must appear on.")
+    args = parser.parse_args()
+
+    reports = preprocess_directory(args.directory_path, args.output_dir, args.split_chars, args.workers, args.boilerplate_ratio)
+    sys.exit(1 if any("error" in r for r in reports) else 0)
+
+if __name__ == "__main__":
+    main()
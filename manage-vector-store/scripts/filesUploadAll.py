@@ -1,43 +1,156 @@
 """
 Uploads all files in a directory to OpenAI and prints their IDs to stdout.
+Uploads run concurrently with retries, and a local manifest mapping content
+hashes to file IDs lets unchanged files be skipped and interrupted runs resume.
 """
 
 import argparse
+import hashlib
+import json
 import os
+import random
 import sys
-from openai import OpenAI
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openai import NotFoundError
+from openaiClient import get_client
 
-def upload_all_files(directory_path: str):
-    """Uploads all files in a directory to OpenAI and prints their IDs to stdout."""
-    client = OpenAI()
+MANIFEST_NAME = ".upload_manifest.json"
+
+def file_sha256(file_path: str) -> str:
+    """Computes the SHA-256 of a file in chunks."""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+class UploadManifest:
+    """Thread-safe JSON manifest mapping content hashes to OpenAI file IDs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    def get(self, digest: str):
+        with self._lock:
+            return self.entries.get(digest)
+
+    def record(self, digest: str, file_id: str, filename: str, size: int):
+        """Records an upload and saves the manifest atomically so a crash never loses it."""
+        with self._lock:
+            self.entries[digest] = {
+                "file_id": file_id,
+                "filename": filename,
+                "size": size,
+                "uploaded_at": int(time.time()),
+            }
+            self._save()
+
+    def forget(self, digest: str):
+        with self._lock:
+            if self.entries.pop(digest, None) is not None:
+                self._save()
+
+    def forget_file(self, file_id: str):
+        """Drops every entry that points at a file ID, e.g. after the file was deleted."""
+        with self._lock:
+            stale = [digest for digest, entry in self.entries.items() if entry["file_id"] == file_id]
+            for digest in stale:
+                del self.entries[digest]
+            if stale:
+                self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def with_retries(func, retries: int, description: str):
+    """Calls func, retrying with exponential backoff and jitter."""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = min(30, 2 ** attempt) + random.uniform(0, 1)
+            print(f"Retrying {description} in {delay:.1f}s after error: {e}", file=sys.stderr)
+            time.sleep(delay)
+
+def upload_one(client, manifest: UploadManifest, file_path: str, retries: int, verify: bool):
+    """Uploads a single file unless the manifest already has its content. Returns its file ID."""
+    filename = os.path.basename(file_path)
+    digest = file_sha256(file_path)
+
+    entry = manifest.get(digest)
+    if entry:
+        if not verify:
+            print(f"Skipped unchanged file: {filename} (ID: {entry['file_id']})", file=sys.stderr)
+            return entry["file_id"]
+        try:
+            client.files.retrieve(entry["file_id"])
+            print(f"Skipped unchanged file: {filename} (ID: {entry['file_id']})", file=sys.stderr)
+            return entry["file_id"]
+        except NotFoundError:
+            print(f"Manifest entry for {filename} is stale, uploading again", file=sys.stderr)
+            manifest.forget(digest)
+
+    def create():
+        with open(file_path, "rb") as file:
+            return client.files.create(file=file, purpose="assistants")
+
+    response = with_retries(create, retries, f"upload of {filename}")
+    manifest.record(digest, response.id, filename, os.path.getsize(file_path))
+    print(f"Uploaded file: {filename} (ID: {response.id})", file=sys.stderr)
+    return response.id
+
+def upload_all_files(directory_path: str, workers: int = 8, retries: int = 3, manifest_path: str = None, verify: bool = True, client=None) -> list:
+    """Uploads all files in a directory to OpenAI. Returns their file IDs in directory order."""
+    # Retries are handled here with backoff, so the client should not retry on its own
+    client = (client or get_client()).with_options(max_retries=0)
     if not os.path.isdir(directory_path):
         print(f"Error: Directory not found at {directory_path}", file=sys.stderr)
-        sys.exit(1)
-
-    file_ids = []
-    for filename in os.listdir(directory_path):
-        file_path = os.path.join(directory_path, filename)
-        if os.path.isfile(file_path):
-            try:
-                with open(file_path, "rb") as file:
-                    response = client.files.create(
-                        file=file,
-                        purpose="assistants"
-                    )
-                file_ids.append(response.id)
-                print(f"Uploaded file: {filename} (ID: {response.id})", file=sys.stderr)
-            except Exception as e:
-                print(f"Error uploading file {filename}: {e}", file=sys.stderr)
-    
-    print(" ".join(file_ids))
+        return []
+
+    manifest = UploadManifest(manifest_path or os.path.join(directory_path, MANIFEST_NAME))
+    file_paths = [
+        os.path.join(directory_path, filename)
+        for filename in sorted(os.listdir(directory_path))
+        if not filename.startswith(".") and os.path.isfile(os.path.join(directory_path, filename))
+    ]
+
+    def task(file_path):
+        try:
+            return upload_one(client, manifest, file_path, retries, verify)
+        except Exception as e:
+            print(f"Error uploading file {os.path.basename(file_path)}: {e}", file=sys.stderr)
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # Identical files share one upload, so drop repeated IDs while keeping directory order
+        file_ids = list(dict.fromkeys(file_id for file_id in executor.map(task, file_paths) if file_id))
+
+    return file_ids
 
 def main():
     """Main function to parse arguments and upload files."""
     parser = argparse.ArgumentParser(description="Upload all files in a directory to OpenAI and print their IDs.")
     parser.add_argument("directory_path", help="The path to the directory containing files to upload.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent uploads.")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per file with exponential backoff.")
+    parser.add_argument("--manifest", help=f"Manifest path (default: <directory>/{MANIFEST_NAME}).")
+    parser.add_argument("--no-verify", action="store_true", help="Trust the manifest without checking that files still exist in OpenAI.")
     args = parser.parse_args()
-    
-    upload_all_files(args.directory_path)
+
+    file_ids = upload_all_files(args.directory_path, args.workers, args.retries, args.manifest, not args.no_verify)
+    print(" ".join(file_ids))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
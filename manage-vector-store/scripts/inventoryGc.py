@@ -0,0 +1,205 @@
+"""
+Garbage-collects the OpenAI file and vector store inventory.
+Finds stale vector stores, files no store references and duplicate uploads,
+then deletes them concurrently under a request rate limit.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from openaiClient import get_client
+from fileList import iter_files
+from vectorList import iter_vector_stores
+from fileDelete import delete_file
+from vectorDelete import delete_vector_store
+from filesUploadAll import UploadManifest
+from listing import format_size
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+def build_index(client, purpose: str = "assistants", workers: int = 8) -> dict:
+    """Lists every file and vector store, plus the file IDs attached to each store."""
+    files = {f.id: f for f in iter_files(client, purpose=purpose)}
+    stores = {s.id: s for s in iter_vector_stores(client)}
+
+    def attached(store_id):
+        return [f.id for f in client.vector_stores.files.list(vector_store_id=store_id, limit=100)]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        store_files = dict(zip(stores, executor.map(attached, stores)))
+    print(f"Indexed {len(files)} files and {len(stores)} vector stores", file=sys.stderr)
+    return {"files": files, "stores": stores, "store_files": store_files}
+
+def plan_collection(index: dict, keep_stores: set = frozenset(), keep_files: set = frozenset(), min_age_days: float = 1.0, superseded: bool = False) -> dict:
+    """Decides which stores and files are garbage. Nothing is deleted here.
+
+    With `superseded`, older stores sharing a name with a newer one (left behind by
+    repeated setup runs) are stale as well.
+    """
+    cutoff = time.time() - min_age_days * 86400
+    files, stores, store_files = index["files"], index["stores"], index["store_files"]
+
+    # Expired stores and empty stores that are old enough are stale
+    stale_stores = [
+        store_id for store_id, store in stores.items()
+        if store_id not in keep_stores
+        and (store.status == "expired" or (store.file_counts.total == 0 and store.created_at < cutoff))
+    ]
+    if superseded:
+        newest = {}
+        for store_id, store in stores.items():
+            if store.name and (store.name not in newest or store.created_at > stores[newest[store.name]].created_at):
+                newest[store.name] = store_id
+        stale_stores += [
+            store_id for store_id, store in stores.items()
+            if store.name and newest[store.name] != store_id and store_id not in keep_stores and store_id not in stale_stores
+        ]
+
+    referenced = set()
+    for store_id, file_ids in store_files.items():
+        if store_id not in stale_stores:
+            referenced.update(file_ids)
+
+    # Recent files may belong to an upload that has not been attached yet
+    collectable = {
+        file_id for file_id, f in files.items()
+        if file_id not in referenced and file_id not in keep_files and f.created_at < cutoff
+    }
+
+    # Unreferenced uploads of a filename and size that is still in use are duplicates;
+    # otherwise the newest upload is the orphan and older copies are duplicates
+    groups = defaultdict(list)
+    for file_id in collectable:
+        groups[(files[file_id].filename, files[file_id].bytes)].append(file_id)
+
+    kept = {(files[f].filename, files[f].bytes) for f in referenced | set(keep_files) if f in files}
+    orphan_files, duplicate_files = [], []
+    for key, file_ids in groups.items():
+        file_ids.sort(key=lambda file_id: files[file_id].created_at, reverse=True)
+        if key in kept:
+            duplicate_files.extend(file_ids)
+        else:
+            orphan_files.append(file_ids[0])
+            duplicate_files.extend(file_ids[1:])
+
+    return {
+        "stale_stores": stale_stores,
+        "orphan_files": sorted(orphan_files),
+        "duplicate_files": sorted(duplicate_files),
+    }
+
+def run_gc(purpose: str = "assistants", keep_stores: list = None, manifest_path: str = None, min_age_days: float = 1.0,
+           superseded: bool = False, dry_run: bool = False, workers: int = 8, rate: float = 10.0, client=None):
+    """Finds and deletes stale stores, orphan files and duplicates. Returns the plan with a `failed` list, or None on error."""
+    keep_stores = set(keep_stores or [])
+    if os.environ.get("VECTOR_STORE_ID"):
+        keep_stores.add(os.environ["VECTOR_STORE_ID"])
+    # Every setup run names its store the same, so the live one may not be the newest
+    if superseded and not keep_stores:
+        print("Error: --superseded needs the live store, pass --keep-store or export VECTOR_STORE_ID", file=sys.stderr)
+        return None
+    client = client or get_client()
+
+    manifest = UploadManifest(manifest_path) if manifest_path else None
+    keep_files = {entry["file_id"] for entry in manifest.entries.values()} if manifest else set()
+
+    try:
+        index = build_index(client, purpose, workers)
+    except Exception as e:
+        print(f"Error building inventory index: {e}", file=sys.stderr)
+        return None
+
+    plan = plan_collection(index, keep_stores, keep_files, min_age_days, superseded)
+    plan["failed"] = []
+    if manifest:
+        plan["stale_manifest_entries"] = [
+            digest for digest, entry in manifest.entries.items() if entry["file_id"] not in index["files"]
+        ]
+
+    if dry_run:
+        print_summary(plan, index, dry_run=True)
+        return plan
+
+    limiter = RateLimiter(rate)
+
+    def limited(func):
+        def call(item_id):
+            limiter.acquire()
+            return func(item_id, client)
+        return call
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # Stores go first so their files are no longer referenced when they are deleted
+        for store_id, ok in zip(plan["stale_stores"], executor.map(limited(delete_vector_store), plan["stale_stores"])):
+            if not ok:
+                plan["failed"].append(store_id)
+        file_ids = plan["orphan_files"] + plan["duplicate_files"]
+        for file_id, ok in zip(file_ids, executor.map(limited(delete_file), file_ids)):
+            if not ok:
+                plan["failed"].append(file_id)
+
+    if manifest:
+        for digest in plan["stale_manifest_entries"]:
+            manifest.forget(digest)
+
+    print_summary(plan, index)
+    return plan
+
+def print_summary(plan: dict, index: dict, dry_run: bool = False):
+    """Prints what was (or would be) collected and the storage reclaimed."""
+    prefix = "[dry run] " if dry_run else ""
+    for store_id in plan["stale_stores"]:
+        store = index["stores"][store_id]
+        print(f"{prefix}stale store: {store_id} ({store.name}, {store.status}, {format_size(store.usage_bytes)})")
+    for label in ("orphan_files", "duplicate_files"):
+        for file_id in plan[label]:
+            f = index["files"][file_id]
+            print(f"{prefix}{label[:-6]} file: {file_id} ({f.filename}, {format_size(f.bytes)})")
+
+    failed = set(plan["failed"])
+    store_bytes = sum(index["stores"][s].usage_bytes or 0 for s in plan["stale_stores"] if s not in failed)
+    file_bytes = sum(index["files"][f].bytes or 0 for f in plan["orphan_files"] + plan["duplicate_files"] if f not in failed)
+    verb = "Would reclaim" if dry_run else "Reclaimed"
+    print(f"{prefix}Stale stores: {len(plan['stale_stores'])}, Orphan files: {len(plan['orphan_files'])}, "
+          f"Duplicate files: {len(plan['duplicate_files'])}, Failed: {len(plan['failed'])}")
+    print(f"{prefix}{verb} {format_size(file_bytes)} of file storage and {format_size(store_bytes)} of vector storage")
+    if "stale_manifest_entries" in plan:
+        print(f"{prefix}Stale manifest entries: {len(plan['stale_manifest_entries'])}")
+
+def main():
+    """Main function to parse arguments and collect unused files and stores."""
+    parser = argparse.ArgumentParser(description="Delete stale vector stores, orphan files and duplicate uploads.")
+    parser.add_argument("--purpose", default="assistants", help="Only consider files with this purpose.")
+    parser.add_argument("--keep-store", action="append", default=[], help="Vector store ID that is never deleted (repeatable).")
+    parser.add_argument("--manifest", help="Upload manifest whose files are kept and whose stale entries are pruned.")
+    parser.add_argument("--min-age-days", type=float, default=1.0, help="Ignore files and empty stores newer than this.")
+    parser.add_argument("--superseded", action="store_true", help="Also delete older stores that share a name with a newer one. Requires --keep-store or VECTOR_STORE_ID.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent deletions.")
+    parser.add_argument("--rate", type=float, default=10.0, help="Maximum delete requests per second.")
+    args = parser.parse_args()
+
+    plan = run_gc(args.purpose, args.keep_store, args.manifest, args.min_age_days, args.superseded,
+                  args.dry_run, args.workers, args.rate)
+    sys.exit(1 if plan is None or plan["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Shared helpers for streaming, filtered listings of files and vector stores.
+"""
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+def parse_date(value: str) -> int:
+    """Parses YYYY-MM-DD (or an ISO datetime) into a UTC unix timestamp."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+def format_size(num_bytes) -> str:
+    """Formats a byte count for humans."""
+    if num_bytes is None:
+        return "-"
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def format_time(timestamp) -> str:
+    """Formats a unix timestamp as a UTC date and time."""
+    if not timestamp:
+        return "-"
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+def filter_items(items, name_of, name_prefix: str = None, created_after: int = None, created_before: int = None):
+    """Lazily filters items listed newest first by name prefix and creation time.
+
+    Stops fetching pages as soon as items are older than `created_after`.
+    """
+    for item in items:
+        if created_after is not None and item.created_at < created_after:
+            break
+        if created_before is not None and item.created_at >= created_before:
+            continue
+        if name_prefix and not (name_of(item) or "").startswith(name_prefix):
+            continue
+        yield item
+
+def print_rows(rows, columns: list, output: str = "table") -> int:
+    """Prints rows as they arrive, as a fixed-width table or JSON lines. Returns the row count.
+
+    `columns` is a list of (key, header, width) tuples; table cells are formatted strings
+    while JSON lines carry the raw values.
+    """
+    count = 0
+    if output == "table":
+        print("  ".join(header.ljust(width) for _, header, width in columns).rstrip())
+    for raw, formatted in rows:
+        count += 1
+        if output == "json":
+            print(json.dumps(raw, ensure_ascii=False), flush=True)
+        else:
+            cells = [str(formatted[key]).ljust(width) for key, _, width in columns]
+            print("  ".join(cells).rstrip(), flush=True)
+    if output == "table":
+        print(f"{count} item(s)")
+    return count
+
+def add_filter_arguments(parser: argparse.ArgumentParser):
+    """Adds the filter and output options shared by the listing commands."""
+    parser.add_argument("--prefix", help="Only include names starting with this prefix.")
+    parser.add_argument("--created-after", type=parse_date, help="Only include items created on or after this date (YYYY-MM-DD).")
+    parser.add_argument("--created-before", type=parse_date, help="Only include items created before this date (YYYY-MM-DD).")
+    parser.add_argument("--output", choices=["table", "json"], default="table", help="Table or JSON lines.")
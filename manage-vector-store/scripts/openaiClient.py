@@ -0,0 +1,15 @@
+"""
+Shared OpenAI client for the vector store scripts.
+A single client keeps one HTTP connection pool for every operation in a process.
+"""
+
+from openai import OpenAI
+
+_client = None
+
+def get_client() -> OpenAI:
+    """Returns the process-wide OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = OpenAI()
+    return _client
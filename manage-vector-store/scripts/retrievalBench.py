@@ -0,0 +1,178 @@
+"""
+Offline retrieval evaluation for a vector store.
+Runs a set of questions with expected source documents through the vector store
+search API concurrently and reports recall@k, MRR and latency percentiles.
+Results are saved as JSON so two runs can be compared.
+
+Question sets are JSON or YAML, either a list or {"questions": [...]}:
+
+    - question: "¿Qué es un microservicio?"
+      expected: ["Tema3_Microservicios.pdf"]
+
+Expected documents match on filename or file ID. Pass a fake `client` to
+run_benchmark (or point OPENAI_BASE_URL at a local server) to run without the API.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openaiClient import get_client
+
+def load_questions(path: str) -> list:
+    """Loads a JSON or YAML question set."""
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            data = yaml.safe_load(file)
+        else:
+            data = json.load(file)
+    questions = data["questions"] if isinstance(data, dict) else data
+    for item in questions:
+        if not item.get("question") or not item.get("expected"):
+            raise ValueError(f"Every entry needs 'question' and 'expected': {item}")
+        if isinstance(item["expected"], str):
+            item["expected"] = [item["expected"]]
+    return questions
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def rank_documents(results) -> list:
+    """Collapses chunk results into distinct documents in rank order."""
+    ranked, seen = [], set()
+    for result in results:
+        if result.file_id in seen:
+            continue
+        seen.add(result.file_id)
+        ranked.append({"file_id": result.file_id, "filename": result.filename, "score": round(result.score, 4)})
+    return ranked
+
+def score_query(ranked: list, expected: list, k: int) -> dict:
+    """Computes recall@k and reciprocal rank for one query."""
+    wanted = set(expected)
+    found, first_rank = set(), None
+    for rank, doc in enumerate(ranked[:k], start=1):
+        match = wanted & {doc["filename"], doc["file_id"]}
+        if match:
+            found |= match
+            first_rank = first_rank or rank
+    return {
+        "recall": len(found) / len(wanted),
+        "reciprocal_rank": 1.0 / first_rank if first_rank else 0.0,
+    }
+
+def run_benchmark(vector_store_id: str, questions: list, k: int = 10, workers: int = 8, score_threshold: float = None,
+                  rewrite_query: bool = False, client=None) -> dict:
+    """Runs every question against the vector store. Returns the full result document."""
+    client = client or get_client()
+    params = {"max_num_results": k, "rewrite_query": rewrite_query}
+    if score_threshold is not None:
+        params["ranking_options"] = {"score_threshold": score_threshold}
+
+    def run_one(item):
+        start = time.perf_counter()
+        try:
+            page = client.vector_stores.search(vector_store_id=vector_store_id, query=item["question"], **params)
+            ranked = rank_documents(page.data)
+            error = None
+        except Exception as e:
+            ranked, error = [], str(e)
+        latency_ms = (time.perf_counter() - start) * 1000
+        result = {"question": item["question"], "expected": item["expected"], "latency_ms": round(latency_ms, 1),
+                  "retrieved": ranked, **score_query(ranked, item["expected"], k)}
+        if error:
+            result["error"] = error
+        return result
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(run_one, questions))
+
+    latencies = [r["latency_ms"] for r in results if "error" not in r]
+    count = max(1, len(results))
+    summary = {
+        "queries": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        f"recall@{k}": round(sum(r["recall"] for r in results) / count, 4),
+        "mrr": round(sum(r["reciprocal_rank"] for r in results) / count, 4),
+        "hit_rate": round(sum(1 for r in results if r["reciprocal_rank"]) / count, 4),
+        "latency_ms": {f"p{p}": round(percentile(latencies, p), 1) for p in (50, 90, 95, 99)},
+    }
+    return {
+        "vector_store_id": vector_store_id,
+        "started_at": int(started),
+        "config": {"k": k, "workers": workers, "score_threshold": score_threshold, "rewrite_query": rewrite_query},
+        "summary": summary,
+        "results": results,
+    }
+
+def print_report(run: dict):
+    """Prints the summary of a benchmark run."""
+    summary = run["summary"]
+    k = run["config"]["k"]
+    latency = summary["latency_ms"]
+    print(f"Vector store {run['vector_store_id']}: {summary['queries']} queries, {summary['errors']} errors")
+    print(f"recall@{k}: {summary[f'recall@{k}']:.3f}  MRR: {summary['mrr']:.3f}  hit rate: {summary['hit_rate']:.3f}")
+    print("latency ms: " + "  ".join(f"{name} {value:.0f}" for name, value in latency.items()))
+    for result in run["results"]:
+        if not result["reciprocal_rank"]:
+            print(f"  miss: {result['question']} (expected {', '.join(result['expected'])})")
+
+def compare_runs(baseline: dict, current: dict):
+    """Prints metric deltas between two runs and the questions whose rank changed."""
+    for key, value in current["summary"].items():
+        old = baseline["summary"].get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            for name, v in value.items():
+                if name in old:
+                    print(f"latency {name}: {old[name]:.0f} -> {v:.0f} ms ({v - old[name]:+.0f})")
+        elif isinstance(value, float) and isinstance(old, (int, float)):
+            print(f"{key}: {old:.3f} -> {value:.3f} ({value - old:+.3f})")
+
+    before = {r["question"]: r["reciprocal_rank"] for r in baseline["results"]}
+    for result in current["results"]:
+        old = before.get(result["question"])
+        if old is not None and old != result["reciprocal_rank"]:
+            label = "better" if result["reciprocal_rank"] > old else "worse"
+            print(f"  {label}: {result['question']} (RR {old:.2f} -> {result['reciprocal_rank']:.2f})")
+
+def save_and_compare(run: dict, output: str = None, compare: str = None):
+    """Writes the run to `output` and diffs it against the `compare` file when given."""
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(run, file, indent=2, ensure_ascii=False)
+        print(f"Results saved to {output}")
+    if compare:
+        with open(compare, "r", encoding="utf-8") as file:
+            compare_runs(json.load(file), run)
+
+def main():
+    """Main function to parse arguments and benchmark retrieval."""
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency of a vector store.")
+    parser.add_argument("vector_store_id", help="The ID of the vector store to evaluate.")
+    parser.add_argument("questions", help="JSON or YAML file with questions and expected documents.")
+    parser.add_argument("-k", type=int, default=10, help="Number of results per query.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent searches.")
+    parser.add_argument("--score-threshold", type=float, help="Ranking score threshold passed to the search.")
+    parser.add_argument("--rewrite-query", action="store_true", help="Let the API rewrite queries before searching.")
+    parser.add_argument("--output", help="Save the results as JSON to this path.")
+    parser.add_argument("--compare", help="A previous results file to diff against.")
+    args = parser.parse_args()
+
+    run = run_benchmark(args.vector_store_id, load_questions(args.questions), args.k, args.workers,
+                        args.score_threshold, args.rewrite_query)
+    print_report(run)
+    save_and_compare(run, args.output, args.compare)
+    sys.exit(1 if run["summary"]["errors"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,120 @@
+"""
+Creates a vector store and attaches files to it in batches.
+Batch status is polled concurrently with progressive backoff, failed files are
+retried, and the command only returns once the store is ready to serve.
+"""
+
 import argparse
-from openai import OpenAI
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openaiClient import get_client
+
+DEFAULT_BATCH_SIZE = 500
+
+def wait_for_batches(client, vector_store_id: str, batch_ids: list, poll_interval: float = 1.0, max_interval: float = 15.0, workers: int = 8):
+    """Polls file batches concurrently until none is in progress. Returns the final batch objects."""
+    pending = list(batch_ids)
+    finished = {}
+    interval = poll_interval
+
+    def retrieve(batch_id):
+        return client.vector_stores.file_batches.retrieve(batch_id=batch_id, vector_store_id=vector_store_id)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while pending:
+            time.sleep(interval)
+            for batch in executor.map(retrieve, pending):
+                if batch.status != "in_progress":
+                    finished[batch.id] = batch
+            pending = [batch_id for batch_id in pending if batch_id not in finished]
+            completed = sum(b.file_counts.completed for b in finished.values())
+            print(f"Indexing: {len(finished)}/{len(batch_ids)} batches done, {completed} files completed", file=sys.stderr)
+            interval = min(max_interval, interval * 1.5)
+    return [finished[batch_id] for batch_id in batch_ids]
+
+def failed_batch_files(client, vector_store_id: str, batch) -> dict:
+    """Returns {file_id: error message} for the files of a batch that failed to index."""
+    if not batch.file_counts.failed and not batch.file_counts.cancelled:
+        return {}
+    failed = {}
+    for status in ("failed", "cancelled"):
+        for vs_file in client.vector_stores.file_batches.list_files(
+            batch_id=batch.id, vector_store_id=vector_store_id, filter=status, limit=100
+        ):
+            error = getattr(vs_file, "last_error", None)
+            failed[vs_file.id] = error.message if error else status
+    return failed
+
+def attach_files(client, vector_store_id: str, file_ids: list, batch_size: int = DEFAULT_BATCH_SIZE, retries: int = 2, workers: int = 8) -> dict:
+    """Attaches files in batches, waits for indexing and retries failures.
+
+    Returns {file_id: error message} for the files that still failed after every retry.
+    """
+    remaining = list(file_ids)
+    failed = {}
+    for attempt in range(retries + 1):
+        if not remaining:
+            break
+        if attempt:
+            print(f"Retrying {len(remaining)} failed files (attempt {attempt} of {retries})", file=sys.stderr)
+            # Detach the failed entries first so the retry indexes them from scratch
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                list(executor.map(
+                    lambda file_id: client.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id),
+                    remaining
+                ))
 
-def create_vector_store(name: str, file_ids: list):
-    """Creates a vector store with the given name and file IDs."""
-    client = OpenAI()
+        chunks = [remaining[i:i + batch_size] for i in range(0, len(remaining), batch_size)]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            batches = list(executor.map(
+                lambda chunk: client.vector_stores.file_batches.create(vector_store_id=vector_store_id, file_ids=chunk),
+                chunks
+            ))
+
+        finished = wait_for_batches(client, vector_store_id, [b.id for b in batches], workers=workers)
+        failed = {}
+        for batch in finished:
+            failed.update(failed_batch_files(client, vector_store_id, batch))
+        remaining = list(failed)
+    return failed
+
+def wait_until_ready(client, vector_store_id: str, poll_interval: float = 1.0, max_interval: float = 15.0):
+    """Waits until the vector store has finished processing. Returns the store."""
+    interval = poll_interval
+    while True:
+        vector_store = client.vector_stores.retrieve(vector_store_id)
+        if vector_store.status != "in_progress":
+            return vector_store
+        time.sleep(interval)
+        interval = min(max_interval, interval * 1.5)
+
+def create_vector_store(name: str, file_ids: list, client=None, batch_size: int = DEFAULT_BATCH_SIZE, retries: int = 2, wait: bool = True, workers: int = 8):
+    """Creates a vector store with the given name and file IDs.
+
+    Returns the vector store once it is ready, or None on error.
+    """
+    client = client or get_client()
     try:
-        vector_store = client.vector_stores.create(
-            name=name,
-            file_ids=file_ids
-        )
-        print(f"Vector store '{name}' created successfully. ID: {vector_store.id}")
+        vector_store = client.vector_stores.create(name=name)
+        print(f"Vector store '{name}' created. ID: {vector_store.id}")
+
+        if not wait:
+            for start in range(0, len(file_ids), batch_size):
+                client.vector_stores.file_batches.create(
+                    vector_store_id=vector_store.id,
+                    file_ids=file_ids[start:start + batch_size]
+                )
+            print(f"Submitted {len(file_ids)} files for indexing without waiting.")
+            return vector_store
+
+        failed = attach_files(client, vector_store.id, file_ids, batch_size, retries, workers)
+        vector_store = wait_until_ready(client, vector_store.id)
+
+        for file_id, error in failed.items():
+            print(f"Failed to index file {file_id}: {error}", file=sys.stderr)
+        print(f"Vector store '{name}' ready ({vector_store.status}). ID: {vector_store.id}, "
+              f"files indexed: {len(file_ids) - len(failed)}/{len(file_ids)}")
         return vector_store
     except Exception as e:
         print(f"Error creating vector store: {e}")
@@ -20,9 +125,12 @@ def main():
     parser = argparse.ArgumentParser(description="Create a vector store in OpenAI.")
     parser.add_argument("name", help="The name of the vector store.")
     parser.add_argument("file_ids", nargs='+', help="A list of file IDs to include in the vector store.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Files per file batch.")
+    parser.add_argument("--retries", type=int, default=2, help="Retry rounds for files that fail to index.")
+    parser.add_argument("--no-wait", action="store_true", help="Return as soon as the batches are submitted.")
     args = parser.parse_args()
-    
-    create_vector_store(args.name, args.file_ids)
+
+    create_vector_store(args.name, args.file_ids, batch_size=args.batch_size, retries=args.retries, wait=not args.no_wait)
 
 if __name__ == "__main__":
     main()
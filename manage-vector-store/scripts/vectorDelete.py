@@ -1,22 +1,32 @@
 import argparse
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openaiClient import get_client
 
-def delete_vector_store(vector_store_id: str):
+def delete_vector_store(vector_store_id: str, client=None) -> bool:
     """Deletes a vector store from OpenAI."""
-    client = OpenAI()
+    client = client or get_client()
     try:
         client.vector_stores.delete(vector_store_id)
         print(f"Vector store {vector_store_id} deleted successfully.")
+        return True
     except Exception as e:
         print(f"Error deleting vector store {vector_store_id}: {e}")
+        return False
+
+def delete_vector_stores(vector_store_ids: list, client=None, workers: int = 8) -> list:
+    """Deletes several vector stores concurrently. Returns the IDs that failed."""
+    client = client or get_client()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(lambda store_id: delete_vector_store(store_id, client), vector_store_ids))
+    return [store_id for store_id, ok in zip(vector_store_ids, results) if not ok]
 
 def main():
-    """Main function to parse arguments and delete a vector store."""
-    parser = argparse.ArgumentParser(description="Delete a vector store from OpenAI.")
-    parser.add_argument("vector_store_id", help="The ID of the vector store to delete.")
+    """Main function to parse arguments and delete vector stores."""
+    parser = argparse.ArgumentParser(description="Delete vector stores from OpenAI.")
+    parser.add_argument("vector_store_ids", nargs="+", help="The IDs of the vector stores to delete.")
     args = parser.parse_args()
     
-    delete_vector_store(args.vector_store_id)
+    delete_vector_stores(args.vector_store_ids)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
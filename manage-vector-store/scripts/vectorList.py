@@ -1,17 +1,67 @@
-from openai import OpenAI
+"""
+Lists vector stores in OpenAI.
+Pages are fetched lazily and printed as they arrive, with optional filters.
+"""
 
-def list_vector_stores():
-    """Lists all vector stores from OpenAI."""
-    client = OpenAI()
+import argparse
+import sys
+from openaiClient import get_client
+from listing import add_filter_arguments, filter_items, format_size, format_time, print_rows
+
+STORE_COLUMNS = [
+    ("id", "ID", 36),
+    ("name", "NAME", 30),
+    ("status", "STATUS", 12),
+    ("files", "FILES", 16),
+    ("usage_bytes", "SIZE", 10),
+    ("created_at", "CREATED", 16),
+]
+
+def iter_vector_stores(client=None, name_prefix: str = None, created_after: int = None, created_before: int = None, page_size: int = 100):
+    """Yields vector stores newest first, fetching one page at a time."""
+    client = client or get_client()
+    stores = client.vector_stores.list(limit=page_size, order="desc")
+    return filter_items(stores, lambda s: s.name, name_prefix, created_after, created_before)
+
+def store_rows(stores):
+    """Yields (raw, formatted) rows for print_rows."""
+    for store in stores:
+        counts = store.file_counts
+        raw = {
+            "id": store.id,
+            "name": store.name,
+            "status": store.status,
+            "files": {"completed": counts.completed, "in_progress": counts.in_progress, "failed": counts.failed, "total": counts.total},
+            "usage_bytes": store.usage_bytes,
+            "created_at": store.created_at,
+        }
+        formatted = dict(
+            raw,
+            name=store.name or "-",
+            files=f"{counts.completed}/{counts.total}" + (f" ({counts.failed} failed)" if counts.failed else ""),
+            usage_bytes=format_size(store.usage_bytes),
+            created_at=format_time(store.created_at),
+        )
+        yield raw, formatted
+
+def list_vector_stores(client=None, name_prefix: str = None, created_after: int = None, created_before: int = None, output: str = "table"):
+    """Lists vector stores from OpenAI. Returns the number listed, or None on error."""
     try:
-        vector_stores = client.vector_stores.list()
-        if vector_stores.data:
-            for store in vector_stores.data:
-                print(f"Name: {store.name}, ID: {store.id}")
-        else:
-            print("No vector stores found.")
+        stores = iter_vector_stores(client, name_prefix, created_after, created_before)
+        return print_rows(store_rows(stores), STORE_COLUMNS, output)
     except Exception as e:
-        print(f"Error listing vector stores: {e}")
+        print(f"Error listing vector stores: {e}", file=sys.stderr)
+        return None
+
+def main():
+    """Main function to parse arguments and list vector stores."""
+    parser = argparse.ArgumentParser(description="List vector stores in OpenAI.")
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
+    count = list_vector_stores(name_prefix=args.prefix, created_after=args.created_after,
+                               created_before=args.created_before, output=args.output)
+    sys.exit(1 if count is None else 0)
 
 if __name__ == "__main__":
-    list_vector_stores()
+    main()
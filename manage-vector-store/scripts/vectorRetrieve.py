@@ -1,14 +1,16 @@
 import argparse
-from openai import OpenAI
+from openaiClient import get_client
 
-def retrieve_vector_store(vector_store_id: str):
+def retrieve_vector_store(vector_store_id: str, client=None):
     """Retrieves a vector store from OpenAI."""
-    client = OpenAI()
+    client = client or get_client()
     try:
         vector_store = client.vector_stores.retrieve(vector_store_id)
         print(f"Vector store retrieved successfully: {vector_store}")
+        return vector_store
     except Exception as e:
         print(f"Error retrieving vector store {vector_store_id}: {e}")
+        return None
 
 def main():
     """Main function to parse arguments and retrieve a vector store."""
@@ -0,0 +1,181 @@
+"""
+Synchronizes a vector store with a local directory.
+Only the files that were added, changed or removed locally are attached or detached.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from openaiClient import get_client
+from filesUploadAll import MANIFEST_NAME, UploadManifest, file_sha256, upload_one
+from vectorCreate import attach_files
+from vectorList import iter_vector_stores
+
+def list_store_files(client, vector_store_id: str, manifest: UploadManifest, workers: int = 8):
+    """Returns {file_id: filename} for every file attached to a vector store."""
+    attached = [f.id for f in client.vector_stores.files.list(vector_store_id=vector_store_id, limit=100)]
+    names = {entry["file_id"]: entry["filename"] for entry in manifest.entries.values()}
+
+    # Only files the manifest does not know about need a lookup
+    unknown = [file_id for file_id in attached if file_id not in names]
+
+    def filename_of(file_id):
+        try:
+            return client.files.retrieve(file_id).filename
+        except Exception:
+            return ""
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        names.update(zip(unknown, executor.map(filename_of, unknown)))
+    return {file_id: names[file_id] for file_id in attached}
+
+def files_in_other_stores(client, vector_store_id: str, workers: int = 8) -> set:
+    """Returns the IDs of files attached to any vector store other than `vector_store_id`."""
+    others = [s.id for s in iter_vector_stores(client) if s.id != vector_store_id]
+
+    def attached(store_id):
+        return [f.id for f in client.vector_stores.files.list(vector_store_id=store_id, limit=100)]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return {file_id for file_ids in executor.map(attached, others) for file_id in file_ids}
+
+def sync_vector_store(directory_path: str, vector_store_id: str, workers: int = 8, dry_run: bool = False, delete_files: bool = False, client=None):
+    """Attaches new or changed files and detaches removed ones.
+
+    Returns a summary dict whose "failed" list names the files that could not be
+    uploaded, attached or detached, or None if the store could not be read.
+    """
+    client = client or get_client()
+    if not os.path.isdir(directory_path):
+        print(f"Error: Directory not found at {directory_path}", file=sys.stderr)
+        return None
+
+    manifest = UploadManifest(os.path.join(directory_path, MANIFEST_NAME))
+    local_paths = [
+        os.path.join(directory_path, filename)
+        for filename in sorted(os.listdir(directory_path))
+        if not filename.startswith(".") and os.path.isfile(os.path.join(directory_path, filename))
+    ]
+
+    try:
+        remote = list_store_files(client, vector_store_id, manifest, workers)
+    except Exception as e:
+        print(f"Error listing files of vector store {vector_store_id}: {e}", file=sys.stderr)
+        return None
+    remote_names = {name for name in remote.values() if name}
+
+    # Files whose content is already known keep their file ID; everything else needs an upload
+    desired = {}
+    to_upload = []
+    for path in local_paths:
+        entry = manifest.get(file_sha256(path))
+        if entry and entry["file_id"] in remote:
+            desired[entry["file_id"]] = os.path.basename(path)
+        else:
+            to_upload.append(path)
+
+    added = [os.path.basename(p) for p in to_upload if os.path.basename(p) not in remote_names]
+    changed = [os.path.basename(p) for p in to_upload if os.path.basename(p) in remote_names]
+    failed = []
+
+    def upload(path):
+        try:
+            # Verify manifest hits: a file deleted outside this directory's syncs must be uploaded again
+            return upload_one(client, manifest, path, 3, True)
+        except Exception as e:
+            print(f"Error uploading file {os.path.basename(path)}: {e}", file=sys.stderr)
+            return None
+
+    if not dry_run and to_upload:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            new_ids = list(executor.map(upload, to_upload))
+        for path, file_id in zip(to_upload, new_ids):
+            filename = os.path.basename(path)
+            if file_id:
+                desired[file_id] = filename
+                continue
+            failed.append(filename)
+            # Keep the attached version of a file whose new version could not be uploaded
+            for remote_id, remote_name in remote.items():
+                if remote_name == filename:
+                    desired.setdefault(remote_id, filename)
+
+    to_attach = [file_id for file_id in desired if file_id not in remote]
+    to_detach = [file_id for file_id in remote if file_id not in desired]
+    local_names = {os.path.basename(p) for p in local_paths}
+    removed = [remote[file_id] or file_id for file_id in to_detach if remote[file_id] not in local_names]
+
+    summary = {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "unchanged": len(local_paths) - len(to_upload),
+        "failed": failed,
+    }
+
+    if dry_run:
+        print_summary(summary, dry_run=True)
+        return summary
+
+    # The upload manifest shares file IDs across stores, so only files no other store uses are deleted
+    shared = set()
+    if delete_files and to_detach:
+        try:
+            shared = files_in_other_stores(client, vector_store_id, workers)
+        except Exception as e:
+            print(f"Error listing other vector stores, detached files will be kept: {e}", file=sys.stderr)
+            shared = set(to_detach)
+
+    def detach(file_id):
+        try:
+            client.vector_stores.files.delete(vector_store_id=vector_store_id, file_id=file_id)
+            if file_id in shared:
+                print(f"Keeping file {remote[file_id] or file_id}, another vector store still uses it")
+            elif delete_files:
+                client.files.delete(file_id)
+                # The file ID is gone, so restoring this content later must upload it again
+                manifest.forget_file(file_id)
+            return None
+        except Exception as e:
+            print(f"Error detaching file {remote[file_id] or file_id}: {e}", file=sys.stderr)
+            return remote[file_id] or file_id
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        failed.extend(name for name in executor.map(detach, to_detach) if name)
+
+    if to_attach:
+        try:
+            failed_ids = attach_files(client, vector_store_id, to_attach, workers=workers)
+        except Exception as e:
+            print(f"Error attaching files to vector store {vector_store_id}: {e}", file=sys.stderr)
+            failed_ids = to_attach
+        failed.extend(desired[file_id] for file_id in failed_ids)
+
+    print_summary(summary)
+    return summary
+
+def print_summary(summary: dict, dry_run: bool = False):
+    """Prints a sync summary."""
+    prefix = "[dry run] " if dry_run else ""
+    print(f"{prefix}Added: {len(summary['added'])}, Changed: {len(summary['changed'])}, "
+          f"Removed: {len(summary['removed'])}, Unchanged: {summary['unchanged']}, Failed: {len(summary['failed'])}")
+    for label in ("added", "changed", "removed", "failed"):
+        for name in summary[label]:
+            print(f"  {label}: {name}")
+
+def main():
+    """Main function to parse arguments and sync a vector store."""
+    parser = argparse.ArgumentParser(description="Sync a vector store with a local directory.")
+    parser.add_argument("directory_path", help="The directory the vector store should mirror.")
+    parser.add_argument("vector_store_id", help="The ID of the vector store to update.")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent uploads and detaches.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change.")
+    parser.add_argument("--delete-files", action="store_true", help="Also delete detached files from OpenAI storage unless another vector store uses them.")
+    args = parser.parse_args()
+
+    summary = sync_vector_store(args.directory_path, args.vector_store_id, args.workers, args.dry_run, args.delete_files)
+    sys.exit(1 if summary is None or summary["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,34 @@
 """
 Unified vector store management utility.
-Orchestrates vector store operations by calling scripts.
+Runs vector store operations in-process through the script library and one shared client.
 """
 
 import argparse
-import subprocess
-import sys
 import os
+import sys
 
-def get_script_path(script_name):
-    """Constructs the absolute path to a script in the 'scripts' directory."""
-    return os.path.join(os.path.dirname(__file__), "scripts", script_name)
-
-def run_script(command, capture_output=False):
-    """Runs a script and handles errors."""
-    try:
-        result = subprocess.run(
-            command,
-            check=True,
-            text=True,
-            capture_output=capture_output,
-            encoding='utf-8'
-        )
-        if capture_output:
-            return result.stdout.strip()
-        return None
-    except FileNotFoundError:
-        print(f"Error: Script not found for command: {command}", file=sys.stderr)
-        sys.exit(1)
-    except subprocess.CalledProcessError as e:
-        print(f"Error executing script for command: {' '.join(command)}", file=sys.stderr)
-        if e.stdout:
-            print(f"STDOUT: {e.stdout}", file=sys.stderr)
-        if e.stderr:
-            print(f"STDERR: {e.stderr}", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}", file=sys.stderr)
-        sys.exit(1)
+# The scripts are importable modules as well as standalone commands
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from openaiClient import get_client
+from fileUpload import upload_file
+from filesUploadAll import upload_all_files
+from filesPreprocess import preprocess_directory
+from fileList import list_files
+from listing import add_filter_arguments
+from fileDelete import delete_files
+from vectorCreate import create_vector_store
+from vectorList import list_vector_stores
+from vectorRetrieve import retrieve_vector_store
+from vectorDelete import delete_vector_stores
+from vectorSync import sync_vector_store
+from inventoryGc import run_gc
+from retrievalBench import load_questions, print_report, run_benchmark, save_and_compare
 
 
 def main() -> int:
     """CLI interface for vector store management."""
-    parser = argparse.ArgumentParser(description="Manage OpenAI Vector Stores by orchestrating scripts.")
+    parser = argparse.ArgumentParser(description="Manage OpenAI Vector Stores.")
     subparsers = parser.add_subparsers(dest="command", required=True, help="Available commands")
 
     # File commands
@@ -51,85 +37,165 @@ def main() -> int:
 
     upload_all_parser = subparsers.add_parser("upload-files", help="Upload all files from a directory.")
     upload_all_parser.add_argument("path", help="Directory path to upload from.")
+    upload_all_parser.add_argument("--workers", type=int, default=8, help="Number of concurrent uploads.")
 
-    list_files_parser = subparsers.add_parser("list-files", help="List all uploaded files.")
+    preprocess_parser = subparsers.add_parser("preprocess", help="Convert PDFs into cleaned text files.")
+    preprocess_parser.add_argument("path", help="Directory containing the PDFs.")
+    preprocess_parser.add_argument("output", help="Directory where cleaned text files are written.")
+    preprocess_parser.add_argument("--split-chars", type=int, default=0, help="Split documents into parts of at most this many characters.")
+    preprocess_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    preprocess_parser.add_argument("--upload", action="store_true", help="Upload the cleaned files afterwards.")
 
-    delete_file_parser = subparsers.add_parser("delete-file", help="Delete a file by ID.")
-    delete_file_parser.add_argument("id", help="File ID to delete.")
+    list_files_parser = subparsers.add_parser("list-files", help="List uploaded files.")
+    list_files_parser.add_argument("--purpose", help="Only include files with this purpose (e.g. assistants).")
+    add_filter_arguments(list_files_parser)
+
+    delete_file_parser = subparsers.add_parser("delete-file", help="Delete one or more files by ID.")
+    delete_file_parser.add_argument("ids", nargs="+", help="File IDs to delete.")
+    delete_file_parser.add_argument("--workers", type=int, default=8, help="Number of concurrent deletions.")
 
     # Vector Store commands
     create_store_parser = subparsers.add_parser("create-store", help="Create a vector store.")
     create_store_parser.add_argument("name", help="Vector store name.")
     create_store_parser.add_argument("file_ids", nargs="+", help="List of file IDs.")
+    create_store_parser.add_argument("--batch-size", type=int, default=500, help="Files per file batch.")
+    create_store_parser.add_argument("--no-wait", action="store_true", help="Return as soon as the batches are submitted.")
 
-    list_stores_parser = subparsers.add_parser("list-stores", help="List all vector stores.")
+    list_stores_parser = subparsers.add_parser("list-stores", help="List vector stores.")
+    add_filter_arguments(list_stores_parser)
 
     get_store_parser = subparsers.add_parser("get-store", help="Get details of a vector store.")
     get_store_parser.add_argument("id", help="Vector store ID.")
 
-    delete_store_parser = subparsers.add_parser("delete-store", help="Delete a vector store.")
-    delete_store_parser.add_argument("id", help="Vector store ID.")
+    delete_store_parser = subparsers.add_parser("delete-store", help="Delete one or more vector stores.")
+    delete_store_parser.add_argument("ids", nargs="+", help="Vector store IDs.")
+    delete_store_parser.add_argument("--workers", type=int, default=8, help="Number of concurrent deletions.")
+
+    sync_parser = subparsers.add_parser("sync", help="Sync a vector store with a local directory.")
+    sync_parser.add_argument("path", help="Directory the vector store should mirror.")
+    sync_parser.add_argument("store_id", help="Vector store ID.")
+    sync_parser.add_argument("--workers", type=int, default=8, help="Number of concurrent uploads and detaches.")
+    sync_parser.add_argument("--dry-run", action="store_true", help="Only report what would change.")
+    sync_parser.add_argument("--delete-files", action="store_true", help="Also delete detached files from OpenAI storage unless another vector store uses them.")
+
+    gc_parser = subparsers.add_parser("gc", help="Delete stale stores, orphan files and duplicate uploads.")
+    gc_parser.add_argument("--keep-store", action="append", default=[], help="Vector store ID that is never deleted (repeatable).")
+    gc_parser.add_argument("--manifest", help="Upload manifest whose files are kept and whose stale entries are pruned.")
+    gc_parser.add_argument("--min-age-days", type=float, default=1.0, help="Ignore files and empty stores newer than this.")
+    gc_parser.add_argument("--superseded", action="store_true", help="Also delete older stores that share a name with a newer one. Requires --keep-store or VECTOR_STORE_ID.")
+    gc_parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+    gc_parser.add_argument("--workers", type=int, default=8, help="Number of concurrent deletions.")
+    gc_parser.add_argument("--rate", type=float, default=10.0, help="Maximum delete requests per second.")
+
+    bench_parser = subparsers.add_parser("bench-retrieval", help="Evaluate retrieval quality and latency of a vector store.")
+    bench_parser.add_argument("store_id", help="Vector store ID.")
+    bench_parser.add_argument("questions", help="JSON or YAML file with questions and expected documents.")
+    bench_parser.add_argument("-k", type=int, default=10, help="Number of results per query.")
+    bench_parser.add_argument("--workers", type=int, default=8, help="Number of concurrent searches.")
+    bench_parser.add_argument("--score-threshold", type=float, help="Ranking score threshold passed to the search.")
+    bench_parser.add_argument("--rewrite-query", action="store_true", help="Let the API rewrite queries before searching.")
+    bench_parser.add_argument("--output", help="Save the results as JSON to this path.")
+    bench_parser.add_argument("--compare", help="A previous results file to diff against.")
 
     # Workflow command
     setup_parser = subparsers.add_parser("setup", help="Complete workflow: upload files and create vector store.")
     setup_parser.add_argument("path", help="Directory path for files.")
     setup_parser.add_argument("name", help="Vector store name.")
+    setup_parser.add_argument("--workers", type=int, default=8, help="Number of concurrent uploads.")
+    setup_parser.add_argument("--batch-size", type=int, default=500, help="Files per file batch.")
     
     args = parser.parse_args()
 
-    python_executable = sys.executable
+    # preprocess is local unless it uploads, so it must work without an API key
+    client = get_client() if args.command != "preprocess" else None
     
     if args.command == "upload-file":
-        script_path = get_script_path("fileUpload.py")
-        run_script([python_executable, script_path, args.path])
+        if upload_file(args.path, client) is None:
+            return 1
     
     elif args.command == "upload-files":
-        script_path = get_script_path("filesUploadAll.py")
-        run_script([python_executable, script_path, args.path])
+        file_ids = upload_all_files(args.path, workers=args.workers, client=client)
+        print(" ".join(file_ids))
+        if not file_ids:
+            return 1
+
+    elif args.command == "preprocess":
+        reports = preprocess_directory(args.path, args.output, args.split_chars, args.workers)
+        if not reports or any("error" in r for r in reports):
+            return 1
+        if args.upload:
+            file_ids = upload_all_files(args.output, client=get_client())
+            print(" ".join(file_ids))
+            if not file_ids:
+                return 1
 
     elif args.command == "list-files":
-        script_path = get_script_path("fileList.py")
-        run_script([python_executable, script_path])
+        if list_files(client, args.purpose, args.prefix, args.created_after, args.created_before, args.output) is None:
+            return 1
 
     elif args.command == "delete-file":
-        script_path = get_script_path("fileDelete.py")
-        run_script([python_executable, script_path, args.id])
+        if delete_files(args.ids, client, workers=args.workers):
+            return 1
 
     elif args.command == "create-store":
-        script_path = get_script_path("vectorCreate.py")
-        run_script([python_executable, script_path, args.name] + args.file_ids)
+        if create_vector_store(args.name, args.file_ids, client, batch_size=args.batch_size, wait=not args.no_wait) is None:
+            return 1
 
     elif args.command == "list-stores":
-        script_path = get_script_path("vectorList.py")
-        run_script([python_executable, script_path])
+        if list_vector_stores(client, args.prefix, args.created_after, args.created_before, args.output) is None:
+            return 1
 
     elif args.command == "get-store":
-        script_path = get_script_path("vectorRetrieve.py")
-        run_script([python_executable, script_path, args.id])
+        if retrieve_vector_store(args.id, client) is None:
+            return 1
 
     elif args.command == "delete-store":
-        script_path = get_script_path("vectorDelete.py")
-        run_script([python_executable, script_path, args.id])
+        if delete_vector_stores(args.ids, client, workers=args.workers):
+            return 1
+
+    elif args.command == "sync":
+        summary = sync_vector_store(
+            args.path, args.store_id, workers=args.workers,
+            dry_run=args.dry_run, delete_files=args.delete_files, client=client
+        )
+        if summary is None or summary["failed"]:
+            return 1
+
+    elif args.command == "gc":
+        plan = run_gc(
+            keep_stores=args.keep_store, manifest_path=args.manifest, min_age_days=args.min_age_days,
+            superseded=args.superseded, dry_run=args.dry_run, workers=args.workers, rate=args.rate, client=client
+        )
+        if plan is None or plan["failed"]:
+            return 1
+
+    elif args.command == "bench-retrieval":
+        run = run_benchmark(
+            args.store_id, load_questions(args.questions), args.k, args.workers,
+            args.score_threshold, args.rewrite_query, client
+        )
+        print_report(run)
+        save_and_compare(run, args.output, args.compare)
+        if run["summary"]["errors"]:
+            return 1
 
     elif args.command == "setup":
         print(f"Starting setup for vector store '{args.name}'...")
         
         # 1. Upload files
         print(f"Uploading files from directory: {args.path}")
-        upload_script_path = get_script_path("filesUploadAll.py")
-        file_ids_str = run_script([python_executable, upload_script_path, args.path], capture_output=True)
+        file_ids = upload_all_files(args.path, workers=args.workers, client=client)
         
-        if not file_ids_str:
+        if not file_ids:
             print("No files were uploaded. Aborting setup.", file=sys.stderr)
             return 1
         
-        file_ids = file_ids_str.split()
         print(f"Successfully uploaded {len(file_ids)} files.")
 
         # 2. Create vector store
         print(f"Creating vector store '{args.name}'...")
-        create_script_path = get_script_path("vectorCreate.py")
-        run_script([python_executable, create_script_path, args.name] + file_ids)
+        if create_vector_store(args.name, file_ids, client, batch_size=args.batch_size, workers=args.workers) is None:
+            return 1
         
         print("Setup complete.")
 